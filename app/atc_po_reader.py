@@ -3,6 +3,8 @@ import pandas as pd
 from tabula.io import read_pdf
 import warnings
 import os
+from hashlib import sha256
+from app.export import download_buttons
 os.environ['JAVA_HOME'] = '/usr/lib/jvm/java-11-openjdk-amd64'
 os.environ['PATH'] += os.pathsep + os.path.join(os.environ['JAVA_HOME'], 'bin')
 
@@ -11,7 +13,7 @@ warnings.filterwarnings("ignore", category=pd.errors.SettingWithCopyWarning)
 
 # Streamlit app title and description
 st.title("📊 PDF Table Extractor")
-st.subheader("Upload a PDF to extract tabular data from it, and download it as a CSV file.")
+st.subheader("Upload a PDF to extract tabular data from it, and download it as a CSV, Parquet or Excel file.")
 st.markdown("This app allows you to upload a PDF containing tables and automatically extract them for further use.")
 
 # File upload section with a more prominent upload button
@@ -112,14 +114,11 @@ if uploaded_file is not None:
         else:
             st.dataframe(PO_table)  # Display without styling if no numeric columns exist
 
-        # Provide an option to download the table as a CSV file
-        csv = PO_table.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="⬇️ Download CSV",
-            data=csv,
-            file_name="PO_Table.csv",
-            mime="text/csv",
-            use_container_width=True
+        # Provide an option to download the table, built only when the button is clicked and
+        # kept for the same uploaded file
+        download_buttons(
+            "⬇️ Download", "PO_Table", ("po table", sha256(uploaded_file.getvalue()).hexdigest()),
+            lambda: {'PO Table': PO_table},
         )
     else:
         st.warning("❌ No valid data to display or save.")
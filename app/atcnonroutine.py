@@ -1,61 +1,28 @@
 import streamlit as st
 import pandas as pd
-import requests
-from io import BytesIO
 import plotly.express as px
 import plotly.graph_objects as go
 from hashlib import sha256
+from app.charts import cached_figure, log_chart_timings
+from app.export import download_buttons
+from app.filters import facet_label
+from app.grid import data_grid
+from app.workbook import load_workbook, reload_workbook, show_version
 
+# Selectbox columns answered by the dataset's filter index
+FILTER_COLUMNS = ['job', 'job_status', 'jobcode', 'region']
 
-# Cache Data Load Function
-@st.cache_data(max_entries=5)  # Keeps the cache to 5 entries
-def load_data(shared_link: str):
-    response = requests.get(shared_link)
-    if response.status_code == 200:
-        try:
-            excel_file = BytesIO(response.content)
 
-            # Load specific sheets
-            atc_nr_data = pd.read_excel(excel_file, sheet_name="atc nr data", engine="openpyxl")
-            atc_matrix = pd.read_excel(excel_file, sheet_name="atcmatrix", engine="openpyxl")
-
-            # Merge tables on 'ihs_id'
-            merged_data = pd.merge(atc_nr_data, atc_matrix, on="atc_id", how="inner")
-
-            # Ensure 'revenue_month' is datetime and handle invalid dates
-            # List of columns to convert to datetime
-            date_cols = ['month', 'invoice', 'sav_date']
-            # Apply pd.to_datetime() to each column in the list
-            merged_data[date_cols] = merged_data[date_cols].apply(pd.to_datetime, errors='coerce')
-
-
-            # Specify the list of desired columns
-            columns_to_select = [
-                    'jobcode', 'category', 'description', 'job', 'atc_id', 'region', 
-                    'state', 'cluster', 'regional_supervisor', 'year', 'sav_date',
-                    'month', 'qty', 'unit', 'revenue', 'qty_used', 'unit_used', 'expense', 
-                    'rs_proposed', 'job_status', 'sav_doc', 'po', 'invoice', 
-                    'status', 'comment'
-]
-
-            
-            # Filter the dataframe to keep only the specified columns
-            filtered_data = merged_data[columns_to_select]
-
-            return filtered_data
-        except Exception as e:
-            st.error(f"An error occurred while processing the data: {e}")
-            return None
-    else:
-        st.error("Failed to download the file. Please check the shared link.")
-        return None
-
-
-# Shared link to download the file
-shared_link = "https://1drv.ms/x/c/e9d2c9c9c1997df7/ETjIp_jnagZOiSoc6nOXDoMBipfwxe5muyD-TW009pwEeA?download=1"
-
-# Call the function to load the data
-df = load_data(shared_link)
+# Load the merged ATC data from one version of the shared workbook
+book = load_workbook()
+if book is None:
+    st.stop()
+df = book.dataset("atc nr")
+filter_index = book.filter_index("atc nr", FILTER_COLUMNS)
+sav_dates = book.date_index("atc nr", "sav_date")
+query = book.query("atc nr")
+pending_ledger = book.pending_ledger("atc nr", "regional_supervisor")
+receivables_ledger = book.receivables_ledger("atc nr", "regional_supervisor")
 
 
 
@@ -64,192 +31,228 @@ df = load_data(shared_link)
 #####################################################
 
 st.title('💼 Non Routine - ATC')
+show_version(book)
 
 # Reload Data Button
 if st.button('Reload new data'):
-    st.cache_data.clear()
+    # Only re-parse when the workbook changed on OneDrive
+    if reload_workbook():
+        st.rerun()
 atc_id, job_filter, job_status_filter, jobcode_filter, region_filter = st.columns(5, gap='medium')
 
 # Alt ID Search box (using text_input for dynamic filtering)
 with atc_id:
     search_text = st.text_input('Search alt_id', '').strip()
-    filtered_df = df[df['atc_id'].str.contains(search_text, case=False, na=False)] if search_text else df
+    # Rows are tracked as sorted row ids into df; None means every row
+    search_rows = book.search_index("atc nr", "atc_id").rows(search_text) if search_text else None
+
+# Distinct values and job counts of every selectbox column among the searched rows, most frequent
+# first, from one pass over them and cached per search
+facets = book.result("atc nr", "facets", {'search': search_text.lower()}, lambda: filter_index.facets(search_rows))
 # Requirement Filter
 with job_filter:
-    job_options = filtered_df['job'].unique()
-    selected_job = st.selectbox('Select job', [''] + list(job_options))
+    job_options = dict(facets['job'])
+    selected_job = st.selectbox('Select job', [''] + list(job_options), format_func=facet_label(job_options))
 # Job Status Filter
 with job_status_filter:
-    status_options = filtered_df['job_status'].unique()
-    selected_status = st.selectbox('Select Job Status', [''] + list(status_options))
+    status_options = dict(facets['job_status'])
+    selected_status = st.selectbox('Select Job Status', [''] + list(status_options), format_func=facet_label(status_options))
 # Reference Filter
 with jobcode_filter:
-    jc_options = filtered_df['jobcode'].unique()
-    selected_jc = st.selectbox('Select jobcode', [''] + list(jc_options))
+    jc_options = dict(facets['jobcode'])
+    selected_jc = st.selectbox('Select jobcode', [''] + list(jc_options), format_func=facet_label(jc_options))
 # Region Filter
 with region_filter:
-    region_options = filtered_df['region'].unique()
-    selected_region = st.selectbox('Select Region', [''] + list(region_options))
-
-# Apply Filters to DataFrame
-if selected_job:
-    filtered_df = filtered_df[filtered_df['job'] == selected_job]
-if selected_status:
-    filtered_df = filtered_df[filtered_df['job_status'] == selected_status]
-if selected_jc:
-    filtered_df = filtered_df[filtered_df['jobcode'] == selected_ref]
-if selected_region:
-    filtered_df = filtered_df[filtered_df['region'] == selected_region]
+    region_options = dict(facets['region'])
+    selected_region = st.selectbox('Select Region', [''] + list(region_options), format_func=facet_label(region_options))
+
+# Apply Filters: intersect the row ids of every selected value instead of masking the frame
+selected = {
+    'job': selected_job,
+    'job_status': selected_status,
+    'jobcode': selected_jc,
+    'region': selected_region,
+}
+
+# Row ids and aggregates are cached per filter state and shared by every session
+view_filters = dict(selected, search=search_text.lower())
+rows = book.result(
+    "atc nr", "rows", view_filters,
+    lambda: filter_index.select({column: value for column, value in selected.items() if value}, search_rows)
+)
 
 
 st.markdown('<h1 style="font-size: 30px;">NR</h1>', unsafe_allow_html=True)
 # Display Dataframe
 with st.expander('**Expand**', icon='⚙️'):
-    if filtered_df is not None:
-        st.dataframe(filtered_df, hide_index=True)
-    else:
-        st.write("No data to display.")
+    # One sorted page of the filtered rows at a time
+    data_grid(book, "atc nr", rows, key="atc_grid")
         
         
 
-st.markdown('<h1 style="font-size: 30px;">Pending Documents</h1>', unsafe_allow_html=True)
-
-# Filter data based on the conditions: job_status = 'Closed' and sav_doc is blank
-pending_df = filtered_df[(filtered_df['job_status'] == 'Closed') & (filtered_df['sav_doc'].isna())]
-
-# Create the layout using columns for filters, and download button on one line
-col1, col2, col3 = st.columns([2, 1, 1])
-
-# Filter and display controls in columns
-with col1:
-    # PO Filter (single selection)
-    po_filter = st.selectbox('Select PO Filter', ['All', 'PO available', 'No PO'], key='po_filter_ui')
-
-with col2:
-    # Regional Supervisors Filter (multi-selection)
-    regional_manager_filter = st.multiselect('Select Regional Supervisors', filtered_df['regional_supervisor'].unique(), key='regional_supervisors_ui')
-
-# Filter data based on the selected PO options
-if po_filter == 'PO available':
-    pending_df_po = pending_df[pending_df['po'].notna()]
-elif po_filter == 'No PO':
-    pending_df_po = pending_df[pending_df['po'].isna()]
-else:
-    pending_df_po = pending_df  # "All" option, show all data
-
-# Apply multi-filter for regional supervisors
-if regional_manager_filter:
-    pending_df_po = pending_df_po[pending_df_po['regional_supervisor'].isin(regional_manager_filter)]
-
-# Aggregate the revenue by regional supervisor based on the filters
-aggregated_data = pending_df_po.groupby('regional_supervisor')['revenue'].sum().reset_index(name='Accrued')
-
-# Display the aggregated revenue metric
-total_revenue = aggregated_data['Accrued'].sum()
-st.metric(label="Accrued (₦)", value=f"{total_revenue:,.2f}")
-
-# Create a bar chart using Plotly with amount displayed on each bar
-fig = px.bar(aggregated_data, x='regional_supervisor', y='Accrued', 
-             title='Pending Documentation',
-             labels={'Accrued': 'Accrued Revenue'},
-             text='Accrued')  # Adding text on each bar
-
-# Format the total revenue in a cleaner way (without Naira symbol)
-fig.update_traces(texttemplate='%{text:.2s}', textposition='outside')
-
-# Increase the figure size, change color to maroon, and bold the bar figures
-fig.update_layout(
-    title_font_size=18,
-    xaxis_title_font_size=14,
-    yaxis_title_font_size=14,
-    font=dict(size=14, family='Arial, sans-serif'),
-    bargap=0.15,  # Adjust gap between bars
-    plot_bgcolor='white',  # Background color of the plot
-    bargroupgap=0.1,  # Adjust the gap between bars in the same group
-    coloraxis_showscale=False,  # Hide the color scale
-)
+# The Pending Documents and Receivables Tracker sections are fragments: changing one of their
+# own filters reruns that section alone, on the rows selected by the last full run of the page
+@st.fragment
+def pending_documents(rows, view_filters):
+    st.markdown('<h1 style="font-size: 30px;">Pending Documents</h1>', unsafe_allow_html=True)
+
+    # Create the layout using columns for filters, and download button on one line
+    col1, col2, col3 = st.columns([2, 1, 1])
+
+    # Filter and display controls in columns
+    with col1:
+        # PO Filter (single selection)
+        po_filter = st.selectbox('Select PO Filter', ['All', 'PO available', 'No PO'], key='po_filter_ui')
+
+    with col2:
+        # Regional Supervisors Filter (multi-selection), offering the supervisors of the selected rows
+        supervisors = df['regional_supervisor'] if rows is None else df['regional_supervisor'].take(rows)
+        regional_manager_filter = st.multiselect('Select Regional Supervisors', supervisors.unique(), key='regional_supervisors_ui')
+
+    # Selected PO option as a PO status: with a PO, without one, or either ("All")
+    has_po = {'PO available': True, 'No PO': False}.get(po_filter)
+
+    def pending_view():
+        # Closed jobs with a blank sav_doc are precomputed per supervisor and PO status, so over
+        # every job this adds up a few totals, and otherwise narrows the selected rows
+        return pending_ledger.accrued(has_po, regional_manager_filter, rows)
+
+    pending_filters = dict(view_filters, po=po_filter, supervisors=regional_manager_filter)
+    aggregated_data = book.result("atc nr", "pending by regional_supervisor", pending_filters, pending_view)
+
+    # Display the aggregated revenue metric
+    total_revenue = aggregated_data['Accrued'].sum()
+    st.metric(label="Accrued (₦)", value=f"{total_revenue:,.2f}")
+
+    def pending_chart():
+        # Create a bar chart using Plotly with amount displayed on each bar
+        fig = px.bar(aggregated_data, x='regional_supervisor', y='Accrued', 
+                     title='Pending Documentation',
+                     labels={'Accrued': 'Accrued Revenue'},
+                     text='Accrued')  # Adding text on each bar
+
+        # Format the total revenue in a cleaner way (without Naira symbol)
+        fig.update_traces(texttemplate='%{text:.2s}', textposition='outside')
+
+        # Increase the figure size, change color to maroon, and bold the bar figures
+        fig.update_layout(
+            title_font_size=18,
+            xaxis_title_font_size=14,
+            yaxis_title_font_size=14,
+            font=dict(size=14, family='Arial, sans-serif'),
+            bargap=0.15,  # Adjust gap between bars
+            plot_bgcolor='white',  # Background color of the plot
+            bargroupgap=0.1,  # Adjust the gap between bars in the same group
+            coloraxis_showscale=False,  # Hide the color scale
+        )
+
+        # Change the color to maroon for the bars
+        fig.update_traces(marker_color='maroon')
+
+        return fig
+
+    # Figures are rebuilt only when their aggregates or build code change (see app.charts)
+    fig = cached_figure("atc pending by regional_supervisor", [aggregated_data], pending_chart)
+
+    # Show the bar chart
+    st.plotly_chart(fig)
+
+    # Download button for the filtered data (and, in Excel, the totals by supervisor). The file
+    # is only built when the button is clicked, then kept for every session with these filters
+    download_buttons(
+        "Download Filtered Data", "filtered_data",
+        book.view_key("atc nr", "pending by regional_supervisor", pending_filters),
+        lambda: {
+            'Pending documents': df.take(pending_ledger.rows(has_po, regional_manager_filter, rows)),
+            'By supervisor': aggregated_data,
+        },
+    )
+    log_chart_timings("atc pending documents")
 
-# Change the color to maroon for the bars
-fig.update_traces(marker_color='maroon')
 
-# Show the bar chart
-st.plotly_chart(fig)
+@st.fragment
+def receivables_tracker(rows, view_filters):
+    # Title for the Receivables Tracker section
+    st.markdown('<h1 style="font-size: 30px;">Receivables Tracker</h1>', unsafe_allow_html=True)
 
-# Add Download CSV button for filtered data
-def convert_df_to_csv(df):
-    return df.to_csv(index=False).encode('utf-8')
+    # Create the layout for the date filter and metric
+    col1, col2 = st.columns([2, 1])
 
-# Convert filtered data to CSV
-csv = convert_df_to_csv(pending_df_po)
+    with col1:
+        # Date Filter: Between Date 1 and Date 2
+        date_filter = st.date_input(
+            "Select Date Range (sav_date)",
+            [],
+            key='date_filter_ui'
+        )
 
-# Display download button
-st.download_button(label="Download Filtered Data as CSV", data=csv, file_name='filtered_data.csv', mime='text/csv')
+    def received_view():
+        # Over every job, the ledger's running totals answer any date range with two binary
+        # searches and a subtraction per supervisor
+        if rows is None:
+            return receivables_ledger.received(*date_filter) if len(date_filter) == 2 else receivables_ledger.received()
 
+        # The Receivables Tracker works on the rows selected above
+        received_rows = rows
 
+        # Filter the rows based on the selected date range (binary search on the sorted sav dates)
+        if date_filter and len(date_filter) == 2:
+            start_date, end_date = date_filter
+            received_rows = sav_dates.between(pd.Timestamp(start_date), pd.Timestamp(end_date), received_rows)
 
+        # Aggregate the revenue by regional supervisor
+        return query.aggregate(['regional_supervisor'], {'Total Revenue': ('revenue', 'sum')}, received_rows)
 
+    received_filters = dict(view_filters, sav_dates=tuple(date_filter) if len(date_filter) == 2 else ())
+    aggregated_received_data = book.result("atc nr", "received by regional_supervisor", received_filters, received_view)
 
+    # Display the aggregated revenue metric
+    total_received_revenue = aggregated_received_data['Total Revenue'].sum()
+    st.metric(label="Accrued (₦)", value=f"{total_received_revenue:,.2f}")
 
+    def received_chart():
+        # Create a bar chart using Plotly with amount displayed on each bar
+        fig_received = px.bar(
+            aggregated_received_data,
+            x='regional_supervisor',
+            y='Total Revenue',
+            title='Received Within Filtered Period',
+            labels={'Total Revenue': 'Accrued'},
+            text='Total Revenue',
+            color_discrete_sequence=['#228B22']  # Green bars
+        )
 
-# Title for the Receivables Tracker section
-st.markdown('<h1 style="font-size: 30px;">Receivables Tracker</h1>', unsafe_allow_html=True)
+        # Format the total revenue in a cleaner way
+        fig_received.update_traces(
+            texttemplate='%{text:.2s}', 
+            textposition='outside'
+        )
 
-# Create a new branch dataframe for the Receivables Tracker
-received_df = filtered_df.copy()
+        # Adjust the layout for the bar chart
+        fig_received.update_layout(
+            title_font_size=16,
+            xaxis_title_font_size=14,
+            yaxis_title_font_size=14,
+            font=dict(size=14, family='Arial, sans-serif'),
+            bargap=0.15,  # Adjust gap between bars
+            plot_bgcolor='white'  # Background color of the plot
+        )
+
+        return fig_received
+
+    fig_received = cached_figure("atc received by regional_supervisor", [aggregated_received_data], received_chart)
+
+    # Show the bar chart
+    st.plotly_chart(fig_received)
+    log_chart_timings("atc receivables")
+
+
+pending_documents(rows, view_filters)
 
-# Create the layout for the date filter and metric
-col1, col2 = st.columns([2, 1])
 
-with col1:
-    # Date Filter: Between Date 1 and Date 2
-    date_filter = st.date_input(
-        "Select Date Range (sav_date)",
-        [],
-        key='date_filter_ui'
-    )
 
-# Filter the dataframe based on the selected date range
-if date_filter and len(date_filter) == 2:
-    start_date, end_date = date_filter
-    received_df = received_df[
-        (received_df['sav_date'] >= pd.Timestamp(start_date)) & 
-        (received_df['sav_date'] <= pd.Timestamp(end_date))
-    ]
-
-# Aggregate the revenue by regional supervisor
-aggregated_received_data = received_df.groupby('regional_supervisor')['revenue'].sum().reset_index(name='Total Revenue')
-
-# Display the aggregated revenue metric
-total_received_revenue = aggregated_received_data['Total Revenue'].sum()
-st.metric(label="Accrued (₦)", value=f"{total_received_revenue:,.2f}")
-
-# Create a bar chart using Plotly with amount displayed on each bar
-fig_received = px.bar(
-    aggregated_received_data,
-    x='regional_supervisor',
-    y='Total Revenue',
-    title='Received Within Filtered Period',
-    labels={'Total Revenue': 'Accrued'},
-    text='Total Revenue',
-    color_discrete_sequence=['#228B22']  # Green bars
-)
 
-# Format the total revenue in a cleaner way
-fig_received.update_traces(
-    texttemplate='%{text:.2s}', 
-    textposition='outside'
-)
 
-# Adjust the layout for the bar chart
-fig_received.update_layout(
-    title_font_size=16,
-    xaxis_title_font_size=14,
-    yaxis_title_font_size=14,
-    font=dict(size=14, family='Arial, sans-serif'),
-    bargap=0.15,  # Adjust gap between bars
-    plot_bgcolor='white'  # Background color of the plot
-)
 
-# Show the bar chart
-st.plotly_chart(fig_received)
 
+receivables_tracker(rows, view_filters)
@@ -0,0 +1,173 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Policy of each named cache: seconds an entry stays valid (None: until evicted or cleared),
+# and how many entries or bytes it keeps before dropping the least recently used
+CACHE_POLICIES = {
+    # Page datasets and everything derived from them (lookups, indexes, ledgers, query engines).
+    # Bounded by bytes: one dataset has a sort index per grid column besides its other indexes.
+    "ihs": {"ttl": None, "max_bytes": 256 * 2**20},
+    "atc": {"ttl": None, "max_bytes": 256 * 2**20},
+    "pricebook": {"ttl": None, "max_bytes": 64 * 2**20},
+    # Filtered row ids and aggregates per filter state, shared by every session (see results())
+    "ihs results": {"ttl": None, "max_bytes": 64 * 2**20},
+    "atc results": {"ttl": None, "max_bytes": 64 * 2**20},
+    # Serialized Plotly figures keyed by their inputs, shared by every page (see app.charts)
+    "charts": {"ttl": None, "max_bytes": 32 * 2**20},
+    # Files built for the download buttons, per filter state and format (see app.export)
+    "exports": {"ttl": None, "max_bytes": 128 * 2**20},
+}
+
+
+def size_of(value) -> int:
+    """Approximate bytes held by a cached value."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, pd.Index):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (tuple, list, set, frozenset)):
+        return sys.getsizeof(value) + sum(size_of(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(size_of(key) + size_of(item) for key, item in value.items())
+    if isinstance(getattr(value, "nbytes", None), int):
+        return value.nbytes  # e.g. Arrow tables
+    if hasattr(value, "__dict__") and not isinstance(value, type) and not callable(value):
+        # Indexes, ledgers, dataclasses: what their attributes hold
+        return sys.getsizeof(value) + size_of(vars(value))
+    return sys.getsizeof(value)
+
+
+def filter_key(filters: dict) -> tuple:
+    """Filter state as a hashable key: the active filters only, in name order, with multi-select
+    lists sorted, so sessions that set the same filters in any order share one entry."""
+    active = []
+    for name, value in sorted(filters.items()):
+        if value is None or (isinstance(value, (str, list, tuple)) and len(value) == 0):
+            continue
+        if isinstance(value, list):
+            value = tuple(sorted(value, key=str))
+        active.append((name, value))
+    return tuple(active)
+
+
+class CacheNamespace:
+    """Named, thread-safe cache with its own time-to-live, size limit and invalidation.
+
+    A key that is missing is built once: concurrent callers asking for the same key wait for
+    that build instead of starting their own, so a cleared cache never causes a stampede.
+    """
+
+    def __init__(self, name: str, ttl: float = None, max_entries: int = None, max_bytes: int = None):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0  # Held by the entries, counted only when max_bytes is set
+        self._entries = OrderedDict()  # key -> (stored at, value, bytes), least recently used first
+        self._building = {}  # key -> Event set when its build finishes
+        self._generation = 0  # Bumped by clear(), so builds started before it are not stored
+        self._lock = threading.Lock()
+
+    def _fresh(self, entry) -> bool:
+        return self.ttl is None or time.monotonic() - entry[0] < self.ttl
+
+    def get_or_build(self, key, build):
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and self._fresh(entry):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                pending = self._building.get(key)
+                if pending is None:
+                    pending = self._building[key] = threading.Event()
+                    generation = self._generation
+                    self.misses += 1
+                    break
+            # Another thread is building this key; wait and read its result
+            pending.wait()
+
+        try:
+            value = build()
+            with self._lock:
+                if generation == self._generation:
+                    self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._building.pop(key, None)
+            pending.set()
+
+    def _store(self, key, value):
+        size = size_of(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # Would evict everything else and still not fit
+        if key in self._entries:
+            self.bytes -= self._entries[key][2]
+        self._entries[key] = (time.monotonic(), value, size)
+        self._entries.move_to_end(key)
+        self.bytes += size
+        while (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            self.bytes -= self._entries.popitem(last=False)[1][2]
+
+    def discard(self, match):
+        """Drop the entries whose key satisfies match(key)."""
+        with self._lock:
+            for key in [key for key in self._entries if match(key)]:
+                self.bytes -= self._entries.pop(key)[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            self._generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.bytes, "hits": self.hits, "misses": self.misses}
+
+
+_namespaces = {}
+_namespaces_lock = threading.Lock()
+
+
+def namespace(name: str) -> CacheNamespace:
+    """The process-wide cache called 'name', created on first use from CACHE_POLICIES."""
+    with _namespaces_lock:
+        if name not in _namespaces:
+            _namespaces[name] = CacheNamespace(name, **CACHE_POLICIES.get(name, {}))
+        return _namespaces[name]
+
+
+def _mentions(key, values: set) -> bool:
+    if isinstance(key, tuple):
+        return any(_mentions(part, values) for part in key)
+    return key in values
+
+
+def discard_mentioning(values: set):
+    """Drop the entries of every namespace whose key contains one of 'values', also inside nested
+    key tuples (e.g. the export of a view key)."""
+    with _namespaces_lock:
+        namespaces = list(_namespaces.values())
+    for cache in namespaces:
+        cache.discard(lambda key: _mentions(key, values))
+
+
+def results(scope: str) -> CacheNamespace:
+    """Cache of the filter results computed for the pages of 'scope'."""
+    return namespace(f"{scope} results")
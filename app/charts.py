@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+import types
+from hashlib import sha256
+
+import pandas as pd
+import plotly.io as pio
+
+from app.cache import namespace
+
+logger = logging.getLogger(__name__)
+
+# Charts built and reused by the rerun running on this thread (see log_chart_timings())
+_rerun = threading.local()
+
+
+def _code(code) -> bytes:
+    # Bytecode and literals of a function and the functions defined in it
+    parts = [code.co_code]
+    for constant in code.co_consts:
+        parts.append(_code(constant) if isinstance(constant, types.CodeType) else repr(constant).encode())
+    return b"\0".join(parts)
+
+
+def fingerprint(inputs, build=None) -> str:
+    """Content hash of a chart's inputs (aggregate frames, in value and column order, and scalars)
+    and of the code of its build function, which holds the chart's layout settings. Streamlit
+    reruns an edited page without restarting, so an edited title or colour must not hit the cache."""
+    digest = sha256(_code(build.__code__) if build is not None else b"")
+    for value in inputs:
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            frame = value.to_frame() if isinstance(value, pd.Series) else value
+            digest.update(repr([(column, str(dtype)) for column, dtype in frame.dtypes.items()]).encode())
+            digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+        else:
+            digest.update(repr(value).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _record(kind: str, seconds: float):
+    if getattr(_rerun, "totals", None) is None:
+        _rerun.totals = {"built": [0, 0.0], "reused": [0, 0.0]}
+    _rerun.totals[kind][0] += 1
+    _rerun.totals[kind][1] += seconds
+
+
+def cached_figure(name: str, inputs: list, build):
+    """build() -> Plotly figure, serialized and shared by every session drawing the same chart
+    from the same inputs, which are every value build() reads that can change between reruns.
+    A rerun that changes none of them reloads the figure instead of rebuilding it; build and
+    reload times are logged, and added up for log_chart_timings()."""
+    built = []
+
+    def serialize():
+        start = time.perf_counter()
+        spec = pio.to_json(build(), validate=False)
+        built.append(time.perf_counter() - start)
+        return spec
+
+    start = time.perf_counter()
+    spec = namespace("charts").get_or_build((name, fingerprint(inputs, build)), serialize)
+    figure = pio.from_json(spec)
+    if built:
+        _record("built", built[0])
+        logger.debug("Built chart %r in %.1f ms", name, built[0] * 1000)
+    else:
+        seconds = time.perf_counter() - start
+        _record("reused", seconds)
+        logger.debug("Reused chart %r in %.1f ms", name, seconds * 1000)
+    return figure
+
+
+def log_chart_timings(view: str):
+    """Log how many charts this rerun of 'view' built and reused and the time spent on each, then
+    start counting again. Call it where a page, or a fragment that reruns alone, ends."""
+    totals, _rerun.totals = getattr(_rerun, "totals", None), None
+    if totals is not None:
+        (built, build_seconds), (reused, reuse_seconds) = totals["built"], totals["reused"]
+        logger.info(
+            "%s charts: %d built in %.1f ms, %d reused in %.1f ms",
+            view, built, build_seconds * 1000, reused, reuse_seconds * 1000,
+        )
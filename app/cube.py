@@ -0,0 +1,39 @@
+import pandas as pd
+
+from app.ingest import RollupSpec, rollup
+
+
+class MetricsCube:
+    """Value sums and row counts of a job dataset per combination of its dimensions.
+
+    The cells are the dataset's rollup (see app.ingest), which is kept up to date with every new
+    version. Metrics for filters on the dimensions are read from the matching cells, so they cost
+    time in proportion to the number of cells rather than the number of jobs.
+    """
+
+    def __init__(self, spec: RollupSpec, cells: pd.DataFrame, month: str = None):
+        self.spec = spec
+        self.month = month  # Date dimension that can also be filtered by 'YYYY-MM'
+        self.cells = self._flatten(cells)
+
+    def _flatten(self, cells: pd.DataFrame) -> pd.DataFrame:
+        cells = cells.reset_index()
+        if self.month:
+            cells["month"] = cells[self.month].dt.strftime("%Y-%m")
+        return cells
+
+    def covers(self, columns) -> bool:
+        dimensions = set(self.spec.keys) | ({"month"} if self.month else set())
+        return set(columns) <= dimensions
+
+    def select(self, filters: dict) -> pd.DataFrame:
+        """Cells where every column -> value in 'filters' matches. A NaN value matches the blank
+        cells, as the selectboxes offer blanks as an option (see FilterIndex)."""
+        keep = pd.Series(True, index=self.cells.index)
+        for column, value in filters.items():
+            keep &= self.cells[column].isna() if pd.isna(value) else self.cells[column] == value
+        return self.cells[keep]
+
+    def of_rows(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Cells of some rows of the dataset, for selections the dimensions cannot express."""
+        return self._flatten(rollup(frame, self.spec))
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+# Text columns with at most this many distinct values per row become categoricals
+CATEGORY_RATIO = 0.5
+
+
+def _is_text(series: pd.Series) -> bool:
+    return series.dtype == object or isinstance(series.dtype, pd.StringDtype)
+
+
+def _same_values(before: pd.Series, after: pd.Series) -> bool:
+    return bool(((before == after) | (before.isna() & after.isna())).all())
+
+
+def compact_column(series: pd.Series) -> pd.Series:
+    """Smallest dtype that holds exactly the same values."""
+    if _is_text(series):
+        if len(series) and series.nunique(dropna=True) <= CATEGORY_RATIO * len(series):
+            return series.astype("category")
+        return series
+
+    # Numbers go down to 32 bits at most, which leaves headroom for arithmetic on them
+    if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        info = np.iinfo(np.int32)
+        if len(series) == 0 or (series.min() >= info.min and series.max() <= info.max):
+            return series.astype(np.int32)
+        return series
+
+    if pd.api.types.is_float_dtype(series):
+        # Whole-number columns without blanks become integers, others float32 only when lossless
+        if series.notna().all() and len(series) and (series % 1 == 0).all():
+            as_int = compact_column(series.astype(np.int64))
+            if as_int.dtype != np.int64:
+                return as_int
+        as_float32 = series.astype(np.float32)
+        if _same_values(series, as_float32.astype(np.float64)):
+            return as_float32
+    return series
+
+
+def compact(frame: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({column: compact_column(frame[column]) for column in frame.columns}, index=frame.index)
+
+
+def append_compact(kept: pd.DataFrame, added: pd.DataFrame) -> pd.DataFrame:
+    """Append new rows to a compacted frame, converting them to its dtypes so they stay compact."""
+    kept = kept.copy(deep=False)
+    added = added.copy(deep=False)
+    for column in kept.columns:
+        dtype = kept[column].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            new = pd.Index(added[column].dropna().unique()).difference(dtype.categories)
+            if len(new):
+                # Sorted, as astype("category") gives them for a frame built in one go
+                categories = dtype.categories.append(new)
+                try:
+                    categories = categories.sort_values()
+                except TypeError:
+                    pass  # Values that do not compare keep their order, as in astype("category")
+                kept[column] = kept[column].cat.set_categories(categories)
+            added[column] = pd.Categorical(added[column], categories=kept[column].cat.categories)
+        elif dtype != added[column].dtype:
+            # Keep the narrow type only when the new rows fit it exactly; otherwise concat upcasts
+            try:
+                converted = added[column].astype(dtype)
+            except (TypeError, ValueError):
+                continue
+            if _same_values(added[column], converted.astype(added[column].dtype)):
+                added[column] = converted
+    return pd.concat([kept, added], ignore_index=True)
+
+
+def memory_report(frame: pd.DataFrame) -> pd.DataFrame:
+    """Bytes held by each column, largest first."""
+    usage = frame.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "dtype": frame.dtypes.astype(str),
+        "bytes": usage,
+        "share": usage / max(usage.sum(), 1),
+    })
+    return report.sort_values("bytes", ascending=False)
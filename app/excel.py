@@ -0,0 +1,77 @@
+"""Column-pruned streaming reads of the workbook, in process or on a pool of worker processes.
+
+This module only imports openpyxl and pandas so spawned workers start quickly.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from operator import itemgetter
+
+import openpyxl
+import pandas as pd
+from pandas._libs.parsers import STR_NA_VALUES
+
+# Text read_excel turns into NaN by default, such as the '#N/A' openpyxl returns for a cached formula error
+NA_TEXT = frozenset(STR_NA_VALUES)
+
+
+def open_workbook(content: bytes):
+    return openpyxl.load_workbook(BytesIO(content), read_only=True, data_only=True)
+
+
+def read_columns(worksheet, columns: set) -> pd.DataFrame:
+    """Stream a read-only worksheet and build only the requested columns."""
+    header = next(worksheet.iter_rows(max_row=1, values_only=True), ())
+    wanted = [(i, str(name)) for i, name in enumerate(header) if name is not None and str(name) in columns]
+    if not wanted:
+        return pd.DataFrame()
+
+    # Ask openpyxl only for the span of cells that holds the wanted columns
+    first = wanted[0][0]
+    last = wanted[-1][0]
+    offsets = [i - first for i, _ in wanted]
+    pick = itemgetter(*offsets) if len(offsets) > 1 else (lambda row: (row[offsets[0]],))
+
+    records = []
+    filled = 0  # Rows up to the last one with a value; read_excel drops the blank rows after it
+    for row in worksheet.iter_rows(min_row=2, min_col=first + 1, max_col=last + 1, values_only=True):
+        values = pick(row)
+        if any(value is not None and value != "" for value in values):
+            filled = len(records) + 1
+        if any(value.__class__ is str and value in NA_TEXT for value in values):
+            values = tuple(None if value.__class__ is str and value in NA_TEXT else value for value in values)
+        records.append(values)
+    del records[filled:]
+
+    frame = pd.DataFrame.from_records(records, columns=[name for _, name in wanted])
+    # Empty cells come back as None; use NaN like read_excel, with numeric columns typed as numbers
+    return frame.fillna(float("nan")).infer_objects()
+
+
+def _read_sheet(content: bytes, sheet: str, columns: set) -> pd.DataFrame:
+    # Runs in a worker process with its own read-only handle
+    workbook = open_workbook(content)
+    try:
+        return read_columns(workbook[sheet], columns)
+    finally:
+        workbook.close()
+
+
+def read_sheets(content: bytes, columns: dict, workers: int = 1) -> dict:
+    """Read every sheet in 'columns' (sheet -> column names), on a process pool when workers > 1.
+
+    Work is split by sheet, not by row range: openpyxl's read-only reader fully parses every row
+    before min_row, so a worker for the tail of a sheet costs as much as reading all of it.
+    """
+    if workers <= 1 or len(columns) == 1:
+        workbook = open_workbook(content)
+        try:
+            return {name: read_columns(workbook[name], columns[name]) for name in columns}
+        finally:
+            workbook.close()
+
+    # Spawn rather than fork: the Streamlit server is multi-threaded
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(columns)), mp_context=context) as pool:
+        futures = {name: pool.submit(_read_sheet, content, name, columns[name]) for name in columns}
+        return {name: future.result() for name, future in futures.items()}
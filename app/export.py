@@ -0,0 +1,98 @@
+from io import BytesIO
+
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from app.cache import namespace
+from app.snapshot import arrow_safe
+
+# Rows serialized at a time, so an export never holds more than one chunk in text or cell form
+CHUNK_ROWS = 50_000
+
+# Most rows of an Excel sheet, header included; longer tables continue on another sheet
+EXCEL_ROWS = 1_048_576
+
+
+def _chunks(frame: pd.DataFrame):
+    for start in range(0, max(len(frame), 1), CHUNK_ROWS):
+        yield frame.iloc[start:start + CHUNK_ROWS]
+
+
+def write_csv(sheets: dict) -> bytes:
+    """The first sheet as UTF-8 CSV."""
+    frame = next(iter(sheets.values()))
+    buffer = BytesIO()
+    for i, chunk in enumerate(_chunks(frame)):
+        buffer.write(chunk.to_csv(index=False, header=i == 0).encode('utf-8'))
+    return buffer.getvalue()
+
+
+def write_parquet(sheets: dict) -> bytes:
+    """The first sheet as Parquet, one row group per chunk."""
+    # Columns mixing text and numbers (e.g. PO numbers) are written as text
+    frame = arrow_safe(next(iter(sheets.values())))
+    # Types come from the whole frame, so a chunk of blanks cannot change a column's type
+    schema = pa.Schema.from_pandas(frame, preserve_index=False)
+    buffer = BytesIO()
+    with pq.ParquetWriter(buffer, schema) as writer:
+        for chunk in _chunks(frame):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    return buffer.getvalue()
+
+
+def write_xlsx(sheets: dict) -> bytes:
+    """Every sheet in one Excel workbook, written with openpyxl's write-only (constant memory)
+    mode: rows are streamed to disk as they are appended rather than kept as cells."""
+    workbook = openpyxl.Workbook(write_only=True)
+    for name, frame in sheets.items():
+        header = [str(column) for column in frame.columns]
+        part, sheet, written = 0, None, EXCEL_ROWS
+        for chunk in _chunks(frame):
+            # Blanks as empty cells, and plain Python values rather than numpy ones
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            for row in chunk.itertuples(index=False, name=None):
+                if written >= EXCEL_ROWS:
+                    part += 1
+                    sheet = workbook.create_sheet((name if part == 1 else f"{name} ({part})")[:31])
+                    sheet.append(header)
+                    written = 1
+                sheet.append(row)
+                written += 1
+        if sheet is None:
+            workbook.create_sheet(name[:31]).append(header)
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+# Export formats: file extension, MIME type and writer of each
+FORMATS = {
+    "CSV": ("csv", "text/csv", write_csv),
+    "Parquet": ("parquet", "application/vnd.apache.parquet", write_parquet),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", write_xlsx),
+}
+
+
+def export(key, file_format: str, sheets) -> bytes:
+    """sheets() -> {sheet name: frame} written in 'file_format', shared by every session
+    exporting the same 'key' (the filter state the sheets are built from) in that format."""
+    writer = FORMATS[file_format][2]
+    return namespace("exports").get_or_build((key, file_format), lambda: writer(sheets()))
+
+
+def download_buttons(label: str, file_name: str, key, sheets):
+    """A format picker and a download button for sheets() -> {sheet name: frame}. Nothing is
+    built until the button is clicked; CSV and Parquet hold the first sheet only."""
+    file_format = st.radio('Format', list(FORMATS), horizontal=True, key=f"{file_name}_format")
+    extension, mime, _ = FORMATS[file_format]
+    st.download_button(
+        label=label,
+        data=lambda: export(key, file_format, sheets),
+        file_name=f"{file_name}.{extension}",
+        mime=mime,
+        on_click="ignore",
+        use_container_width=True,
+    )
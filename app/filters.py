@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+
+
+class FilterIndex:
+    """Row-id index of a frame's filter columns, built once per dataset version.
+
+    For each column, every distinct value maps to the sorted ids of the rows holding it. Equality
+    filters are answered by intersecting those lists, starting from the shortest. The codes of all
+    columns are also stacked into one matrix, so the option counts of every column come from a
+    single bincount over the selected rows and a widget change never scans the frame.
+    """
+
+    def __init__(self, frame: pd.DataFrame, columns: list):
+        self.rows = len(frame)
+        self.columns = list(columns)
+        self._codes = {}  # column -> value code of every row
+        self._values = {}  # column -> distinct values, in order of first appearance
+        self._lookup = {}  # column -> value -> code
+        self._order = {}  # column -> row ids sorted by code
+        self._offsets = {}  # column -> start of each code's run in _order
+
+        for column in columns:
+            codes, values = pd.factorize(frame[column], use_na_sentinel=False)
+            codes = codes.astype(np.int32)
+            self._codes[column] = codes
+            self._values[column] = list(values)
+            self._lookup[column] = {value: code for code, value in enumerate(values)}
+            self._order[column] = np.argsort(codes, kind="stable")
+            self._offsets[column] = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(values)))))
+
+        # One row per frame row, one column per filter column; codes shifted so they never overlap
+        self._bases = np.concatenate(([0], np.cumsum([len(self._values[column]) for column in columns])))
+        self._stacked = np.empty((self.rows, len(columns)), dtype=np.int32)
+        for i, column in enumerate(columns):
+            self._stacked[:, i] = self._codes[column] + self._bases[i]
+
+    def rows_with(self, column: str, value) -> np.ndarray:
+        code = self._lookup[column].get(value)
+        if code is None:
+            return np.empty(0, dtype=np.intp)
+        offsets = self._offsets[column]
+        return self._order[column][offsets[code]:offsets[code + 1]]
+
+    def facets(self, rows: np.ndarray = None) -> dict:
+        """Every column's distinct values among 'rows' (all rows when None) with their row counts,
+        most frequent first; values with equal counts keep their order of first appearance."""
+        stacked = self._stacked if rows is None else self._stacked[rows]
+        counts = np.bincount(stacked.ravel(), minlength=self._bases[-1])
+
+        facets = {}
+        for i, column in enumerate(self.columns):
+            column_counts = counts[self._bases[i]:self._bases[i + 1]]
+            codes = np.flatnonzero(column_counts)
+            codes = codes[np.argsort(-column_counts[codes], kind="stable")]
+            values = self._values[column]
+            facets[column] = [(values[code], int(column_counts[code])) for code in codes]
+        return facets
+
+    def select(self, filters: dict, rows: np.ndarray = None) -> np.ndarray:
+        """Sorted ids of the rows among 'rows' (all rows when None) equal to every column -> value
+        in 'filters'. Returns None when there is nothing to filter on, meaning every row."""
+        if not filters:
+            return rows
+
+        # Start from the shortest candidate list and check the other filters on its codes
+        columns = sorted(filters, key=lambda column: len(self.rows_with(column, filters[column])))
+        selected = self.rows_with(columns[0], filters[columns[0]])
+        for column in columns[1:]:
+            code = self._lookup[column].get(filters[column], -1)
+            selected = selected[self._codes[column][selected] == code]
+        if rows is not None:
+            selected = np.intersect1d(selected, rows, assume_unique=True)
+        return selected
+
+
+def facet_label(counts: dict):
+    """Selectbox format_func showing each option with its row count; '' stays blank."""
+    return lambda value: f"{value} ({counts[value]:,})" if value in counts else str(value)
+
+
+def month_key(year, month):
+    return year * 12 + month - 1
+
+
+def month_label(key: int) -> str:
+    # Same text as str(pd.Period(..., 'M'))
+    return f"{key // 12:04d}-{key % 12 + 1:02d}"
+
+
+def date_bound(value, dtype, side: str) -> np.datetime64:
+    """'value' as a datetime64 of 'dtype', for np.searchsorted(..., side=side). A value finer than
+    'dtype' rounds up as a 'left' bound and down as a 'right' one, so only dates inside it match."""
+    bound = pd.Timestamp(value).to_datetime64()
+    stamp = bound.astype(dtype)
+    if side == "left" and stamp < bound:
+        stamp += 1
+    elif side == "right" and stamp > bound:
+        stamp -= 1
+    return stamp
+
+
+class DateIndex:
+    """Rows of a datetime column sorted by date, built once per dataset version.
+
+    Timestamps are kept sorted in the column's own unit next to their row ids, with a month key
+    per entry, so range and month filters are two binary searches. A row's position in that
+    order (its rank) answers the same filters over any selection of rows without a sort.
+    Blank dates match no range or month, like comparisons with NaT.
+    """
+
+    def __init__(self, column: pd.Series):
+        # No cast to nanoseconds: pandas keeps Excel dates in microseconds, and years past 2262
+        # (e.g. a mistyped 3023) would wrap around to the 1800s
+        stamps = column.to_numpy()
+        valid = ~np.isnat(stamps)
+        self._order = np.flatnonzero(valid)[np.argsort(stamps[valid], kind="stable")]
+        self._stamps = stamps[self._order]
+
+        sorted_dates = pd.DatetimeIndex(stamps[self._order])
+        self._months = month_key(sorted_dates.year, sorted_dates.month).to_numpy(dtype=np.int32)
+
+        self._rank = np.full(len(stamps), -1, dtype=np.int64)
+        self._rank[self._order] = np.arange(len(self._order))
+
+    def _ranks(self, rows: np.ndarray) -> np.ndarray:
+        # Ranks of the dated rows among 'rows'
+        ranks = self._rank[rows]
+        return ranks[ranks >= 0]
+
+    def _search(self, value, side: str) -> int:
+        return np.searchsorted(self._stamps, date_bound(value, self._stamps.dtype, side), side=side)
+
+    def _slice(self, start: int, stop: int, rows: np.ndarray) -> np.ndarray:
+        # Sorted ids of the rows ranked in [start, stop), among 'rows' (all rows when None)
+        if rows is None:
+            return np.sort(self._order[start:stop])
+        ranks = self._rank[rows]
+        return rows[(ranks >= start) & (ranks < stop)]
+
+    def bounds(self, rows: np.ndarray = None):
+        """Earliest and latest date among 'rows', or None when they have no dates."""
+        if rows is None:
+            first, last = 0, len(self._stamps) - 1
+        else:
+            ranks = self._ranks(rows)
+            first, last = (ranks.min(), ranks.max()) if len(ranks) else (0, -1)
+        if last < first:
+            return None
+        return pd.Timestamp(self._stamps[first]), pd.Timestamp(self._stamps[last])
+
+    def between(self, start, end, rows: np.ndarray = None) -> np.ndarray:
+        """Sorted ids of the rows dated from 'start' through 'end', both included."""
+        return self._slice(self._search(start, "left"), self._search(end, "right"), rows)
+
+    def on_days(self, start_day, end_day, rows: np.ndarray = None) -> np.ndarray:
+        """Sorted ids of the rows dated on any day from 'start_day' through 'end_day'."""
+        # Up to the start of the next day, counted in the column's unit so late years cannot overflow
+        next_day = date_bound(end_day, self._stamps.dtype, "left") + np.timedelta64(1, "D")
+        last = np.searchsorted(self._stamps, next_day, side="left")
+        return self._slice(self._search(start_day, "left"), last, rows)
+
+    def months(self, rows: np.ndarray = None) -> list:
+        """'YYYY-MM' of every month with rows among 'rows', oldest first."""
+        keys = self._months if rows is None else self._months[self._ranks(rows)]
+        return [month_label(key) for key in np.unique(keys)]
+
+    def in_month(self, month: str, rows: np.ndarray = None) -> np.ndarray:
+        """Sorted ids of the rows dated in 'month' ('YYYY-MM')."""
+        year, number = (int(part) for part in month.split("-"))
+        key = month_key(year, number)
+        first = np.searchsorted(self._months, key, side="left")
+        last = np.searchsorted(self._months, key, side="right")
+        return self._slice(first, last, rows)
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Rows per page offered by the data grids
+PAGE_SIZES = [25, 50, 100, 250]
+
+# Sort option keeping the dataset's own row order
+ROW_ORDER = "(row order)"
+
+
+def sort_codes(column: pd.Series) -> np.ndarray:
+    """Position of every row's value among the column's sorted distinct values, -1 for blanks."""
+    try:
+        codes, _ = pd.factorize(column, sort=True)
+    except TypeError:
+        # Mixed numbers and text cannot be compared; sort them as text, blanks still last
+        codes, _ = pd.factorize(column.astype(str).where(column.notna()), sort=True)
+    return codes
+
+
+class SortIndex:
+    """Rank of every row when a dataset is sorted by one column, built once per dataset version.
+
+    Blanks sort last in both directions and equal values keep their row order, like
+    sort_values(kind='stable'). A page of any selection of rows is then found from the ranks of
+    those rows alone, so paging never sorts or copies the frame.
+    """
+
+    def __init__(self, column: pd.Series):
+        self._codes = sort_codes(column)
+        self._ranks = {}  # descending -> rank of every row
+
+    def _rank(self, descending: bool) -> np.ndarray:
+        if descending not in self._ranks:
+            blank = self._codes < 0
+            distinct = self._codes.max() + 1 if len(self._codes) else 0
+            key = np.where(blank, distinct, distinct - 1 - self._codes if descending else self._codes)
+            order = np.argsort(key, kind="stable")
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = np.arange(len(order))
+            self._ranks[descending] = rank
+        return self._ranks[descending]
+
+    def page(self, start: int, stop: int, rows: np.ndarray = None, descending: bool = False) -> np.ndarray:
+        """Ids of the rows at sorted positions [start, stop) among 'rows' (all rows when None)."""
+        rank = self._rank(descending)
+        if rows is None:
+            rows = np.arange(len(rank))
+        ranks = rank[rows]
+        stop = min(stop, len(ranks))
+        if start >= stop:
+            return np.empty(0, dtype=np.intp)
+        # Only the rows up to the end of the page need ordering
+        first = np.argpartition(ranks, stop - 1)[:stop] if stop < len(ranks) else np.arange(len(ranks))
+        return rows[first[np.argsort(ranks[first])][start:]]
+
+
+def data_grid(book, name: str, rows: np.ndarray = None, key: str = "grid"):
+    """One page of a dataset's rows (all rows when None), sorted and paged on the server.
+
+    Only the visible page is sent to the browser, however many rows are selected. 'key' keeps
+    the widgets of different grids on a page apart.
+    """
+    df = book.dataset(name)
+    total = len(df) if rows is None else len(rows)
+    if not total:
+        st.write("No data to display.")
+        return
+
+    sort_col, direction_col, size_col, page_col = st.columns([2, 1, 1, 1])
+    with sort_col:
+        sort_by = st.selectbox('Sort by', [ROW_ORDER] + list(df.columns), key=f"{key}_sort")
+    with direction_col:
+        descending = st.selectbox('Order', ['Ascending', 'Descending'], key=f"{key}_order") == 'Descending'
+    with size_col:
+        page_size = st.selectbox('Rows per page', PAGE_SIZES, key=f"{key}_size")
+
+    # Narrower filters can leave fewer pages than the one last shown
+    pages = -(-total // page_size)
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    with page_col:
+        page = st.number_input(f'Page (of {pages:,})', min_value=1, max_value=pages, step=1, key=f"{key}_page")
+
+    start, stop = (page - 1) * page_size, min(page * page_size, total)
+    if sort_by == ROW_ORDER:
+        order = np.arange(total)[::-1] if descending else np.arange(total)
+        page_rows = order[start:stop] if rows is None else np.asarray(rows)[order[start:stop]]
+    else:
+        page_rows = book.sort_index(name, sort_by).page(start, stop, rows, descending)
+
+    st.dataframe(df.take(page_rows), hide_index=True)
+    st.caption(f"Rows {start + 1:,}–{stop:,} of {total:,}")
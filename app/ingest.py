@@ -0,0 +1,86 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Rebuild from scratch when more than this share of the job rows changed
+FULL_REBUILD_RATIO = 0.5
+
+
+def fingerprint(frame: pd.DataFrame) -> np.ndarray:
+    """One 64-bit content hash per row."""
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def _repeats(hashes: np.ndarray) -> np.ndarray:
+    # How many earlier rows have the same hash; identical rows are told apart by this number
+    return pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+
+
+def _keys(hashes: np.ndarray) -> pd.MultiIndex:
+    return pd.MultiIndex.from_arrays([hashes, _repeats(hashes)])
+
+
+@dataclass
+class Delta:
+    """Rows added to and removed from a sheet between two versions, as row positions."""
+    added: np.ndarray  # Positions in the new sheet
+    removed: np.ndarray  # Positions in the old sheet
+    rows: int  # Rows in the new sheet
+
+    @property
+    def changed(self) -> int:
+        # An edited row shows up as removed and added at the same position
+        return len(np.intersect1d(self.added, self.removed))
+
+    @property
+    def small(self) -> bool:
+        return len(self.added) + len(self.removed) <= FULL_REBUILD_RATIO * max(self.rows, 1)
+
+    def __str__(self):
+        changed = self.changed
+        return f"{len(self.added) - changed} added, {changed} changed, {len(self.removed) - changed} removed"
+
+
+def diff(old_hashes: np.ndarray, new_hashes: np.ndarray) -> Delta:
+    old_keys = _keys(old_hashes)
+    new_keys = _keys(new_hashes)
+    return Delta(
+        added=np.flatnonzero(~new_keys.isin(old_keys)),
+        removed=np.flatnonzero(~old_keys.isin(new_keys)),
+        rows=len(new_hashes),
+    )
+
+
+def new_positions(old_hashes: np.ndarray, new_hashes: np.ndarray) -> np.ndarray:
+    """Position in the new sheet of every row of the old one, -1 for the rows diff() reports removed."""
+    return _keys(new_hashes).get_indexer(_keys(old_hashes))
+
+
+#####################################################
+########## ROLLUPS
+#####################################################
+
+@dataclass
+class RollupSpec:
+    """Additive aggregate of a dataset: value sums and a row count per group of 'keys'."""
+    keys: list
+    values: list
+    derived: dict = field(default_factory=dict)  # Extra key or value column -> function of the rows
+
+
+def rollup(frame: pd.DataFrame, spec: RollupSpec) -> pd.DataFrame:
+    if spec.derived:
+        frame = frame.assign(**{name: build(frame) for name, build in spec.derived.items()})
+    grouped = frame.groupby(spec.keys, dropna=False, observed=True)
+    result = grouped[spec.values].sum()
+    result["count"] = grouped.size()
+    return result
+
+
+def apply_rollup_delta(current: pd.DataFrame, added: pd.DataFrame, removed: pd.DataFrame, spec: RollupSpec):
+    result = current.sub(rollup(removed, spec), fill_value=0).add(rollup(added, spec), fill_value=0)
+    # Aligning on the groups fills with floats; keep the full build's dtypes (e.g. int counts)
+    result = result.astype(current.dtypes.to_dict())
+    # Groups whose last row was removed disappear
+    return result[result["count"] > 0]
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+from app.filters import date_bound
+
+
+def _revenue(column: pd.Series) -> np.ndarray:
+    # Blank revenue adds nothing, like a pandas sum; whole amounts stay exact in 64-bit integers
+    if pd.api.types.is_integer_dtype(column) or pd.api.types.is_bool_dtype(column):
+        return column.to_numpy(dtype=np.int64, na_value=0)
+    return column.to_numpy(dtype=np.float64, na_value=0.0)
+
+
+class _BySupervisor:
+    """Supervisor codes of a dataset's rows, and the frames of per-supervisor totals."""
+
+    def __init__(self, frame: pd.DataFrame, by: str):
+        self.by = by
+        self._codes, self._supervisors = pd.factorize(frame[by], sort=True)
+        self._lookup = {value: code for code, value in enumerate(self._supervisors)}
+        self._revenue = _revenue(frame['revenue'])
+
+    def _supervisor_codes(self, supervisors: list) -> np.ndarray:
+        return np.array([self._lookup[value] for value in supervisors if value in self._lookup], dtype=np.intp)
+
+    def _sums(self, rows: np.ndarray):
+        # Revenue and job count per supervisor over some rows; blank supervisors are left out
+        codes = self._codes[rows]
+        valid = codes >= 0
+        size = len(self._supervisors)
+        totals = np.bincount(codes[valid], weights=self._revenue[rows][valid], minlength=size)
+        return totals.astype(self._revenue.dtype), np.bincount(codes[valid], minlength=size)
+
+    def _frame(self, totals: np.ndarray, counts: np.ndarray, name: str) -> pd.DataFrame:
+        # Supervisors with at least one job, in value order, like a groupby
+        keep = np.flatnonzero(counts)
+        return pd.DataFrame({self.by: self._supervisors.take(keep), name: totals[keep]})
+
+
+class PendingLedger(_BySupervisor):
+    """Closed jobs still waiting for their SAV document, built once per dataset version.
+
+    Their revenue is summed per supervisor and PO status up front, so accrued revenue for any
+    PO and supervisor filter over every job is a sum over a few precomputed totals. Filters on
+    other columns narrow the ledger's rows with one lookup per selected row.
+    """
+
+    def __init__(self, frame: pd.DataFrame, by: str):
+        super().__init__(frame, by)
+        self._pending = ((frame['job_status'] == 'Closed') & frame['sav_doc'].isna()).to_numpy(dtype=bool, na_value=False)
+        self._has_po = frame['po'].notna().to_numpy()
+
+        # Totals and job counts of the pending jobs with a PO (True) and without one (False)
+        self._totals, self._counts = {}, {}
+        for has_po in (True, False):
+            self._totals[has_po], self._counts[has_po] = self._sums(np.flatnonzero(self._pending & (self._has_po == has_po)))
+
+    def rows(self, po: bool = None, supervisors: list = None, rows: np.ndarray = None) -> np.ndarray:
+        """Sorted ids of the pending jobs among 'rows' (all rows when None) with a PO (po=True),
+        without one (po=False) or either (None), and of one of 'supervisors' if any are given."""
+        keep = self._pending if po is None else self._pending & (self._has_po == po)
+        if supervisors:
+            keep = keep & np.isin(self._codes, self._supervisor_codes(supervisors))
+        return np.flatnonzero(keep) if rows is None else rows[keep[rows]]
+
+    def accrued(self, po: bool = None, supervisors: list = None, rows: np.ndarray = None) -> pd.DataFrame:
+        """Revenue of the pending jobs per supervisor ('Accrued'), filtered as in rows()."""
+        if rows is not None:
+            return self._frame(*self._sums(self.rows(po, supervisors, rows)), 'Accrued')
+
+        statuses = (True, False) if po is None else (po,)
+        totals = sum(self._totals[status] for status in statuses)
+        counts = sum(self._counts[status] for status in statuses)
+        if supervisors:
+            chosen = np.zeros(len(counts), dtype=bool)
+            chosen[self._supervisor_codes(supervisors)] = True
+            counts = np.where(chosen, counts, 0)
+        return self._frame(totals, counts, 'Accrued')
+
+
+class ReceivablesLedger(_BySupervisor):
+    """Revenue received per supervisor over time, built once per dataset version.
+
+    Each supervisor's jobs with a received date are kept sorted by that date with a running
+    total of their revenue, so the revenue received in any date range is two binary searches
+    and a subtraction per supervisor, however many jobs there are.
+    """
+
+    def __init__(self, frame: pd.DataFrame, by: str, date: str = 'sav_date'):
+        super().__init__(frame, by)
+        # Every job, received or not, for the tracker with no date range
+        self._all_totals, self._all_counts = self._sums(np.arange(len(frame)))
+
+        # Dates in their own unit: a cast to nanoseconds would wrap years past 2262 around
+        stamps = frame[date].to_numpy()
+        dated = np.flatnonzero((self._codes >= 0) & frame[date].notna().to_numpy())
+        order = dated[np.lexsort((stamps[dated].view(np.int64), self._codes[dated]))]
+        self._stamps = stamps[order]
+        self._offsets = np.concatenate(([0], np.cumsum(np.bincount(self._codes[order], minlength=len(self._supervisors)))))
+
+        # Running totals restart for each supervisor, which keeps float totals as small as they can be
+        revenue = self._revenue[order]
+        self._running = np.zeros(len(order) + len(self._supervisors), dtype=revenue.dtype)
+        for code in range(len(self._supervisors)):
+            start, stop = self._offsets[code], self._offsets[code + 1]
+            self._running[start + code + 1:stop + code + 1] = np.cumsum(revenue[start:stop])
+
+    def received(self, start=None, end=None) -> pd.DataFrame:
+        """Revenue per supervisor ('Total Revenue') of the jobs received from 'start' through
+        'end', both included; of every job, received or not, when no range is given."""
+        if start is None or end is None:
+            return self._frame(self._all_totals, self._all_counts, 'Total Revenue')
+
+        first = date_bound(start, self._stamps.dtype, "left")
+        last = date_bound(end, self._stamps.dtype, "right")
+        size = len(self._supervisors)
+        totals = np.zeros(size, dtype=self._running.dtype)
+        counts = np.zeros(size, dtype=np.int64)
+        for code in range(size):
+            begin, stop = self._offsets[code], self._offsets[code + 1]
+            stamps = self._stamps[begin:stop]
+            low = np.searchsorted(stamps, first, side="left")
+            high = np.searchsorted(stamps, last, side="right")
+            # Running totals of a supervisor start one slot after its offset, behind a zero
+            totals[code] = self._running[begin + code + high] - self._running[begin + code + low]
+            counts[code] = high - low
+        return self._frame(totals, counts, 'Total Revenue')
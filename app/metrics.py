@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from app.timeseries import bucketed
+
+
+@dataclass
+class IHSMetrics:
+    """Every KPI and chart series of the IHS dashboard for one filter state."""
+
+    job_count: int
+    total_revenue: float
+    total_expense: float
+    closed_jobs: int
+    revenue_by_month: pd.DataFrame  # revenue_month, Total_Revenue, expense, Profit_Percentage
+    count_by_region: pd.DataFrame  # region, Count
+    count_by_job_type: pd.DataFrame  # job_type, Count
+    count_by_period: pd.DataFrame  # request_date (start of each period), Count
+    period: str  # 'day', 'week' or 'month'
+
+    @property
+    def profit_percentage(self) -> float:
+        return (self.total_revenue - self.total_expense) / self.total_revenue * 100
+
+
+def _sums(keys: pd.Series, values: dict) -> pd.DataFrame:
+    """Sum of each values column per key, in key order; blank keys are left out, like groupby."""
+    codes, uniques = pd.factorize(keys, sort=True)
+    valid = codes >= 0
+    sums = {keys.name: uniques}
+    for name, column in values.items():
+        column = column.to_numpy()
+        total = np.bincount(codes[valid], weights=column[valid], minlength=len(uniques))
+        # Counts stay integers; bincount adds up in floats, exact far beyond any job count
+        sums[name] = total if column.dtype.kind == "f" else total.astype(np.int64)
+    return pd.DataFrame(sums)
+
+
+def ihs_metrics(cells: pd.DataFrame, count_by_date: pd.DataFrame) -> IHSMetrics:
+    """Metrics of the IHS dashboard from the cube cells of the selected jobs and their job counts
+    per request date. Every series is summed from the same cells with one factorization per
+    dimension, so revenue and expense per month always line up."""
+    revenue_by_month = _sums(cells['revenue_month'], {'Total_Revenue': cells['total'], 'expense': cells['expense']})
+    revenue_by_month['Profit_Percentage'] = (
+        (revenue_by_month['Total_Revenue'] - revenue_by_month['expense']) / revenue_by_month['Total_Revenue'] * 100
+    )
+    count_by_period, period = bucketed(count_by_date, 'request_date', 'Count')
+    return IHSMetrics(
+        job_count=cells['count'].sum(),
+        total_revenue=cells['total'].sum(),
+        total_expense=cells['expense'].sum(),
+        closed_jobs=cells['count'].to_numpy()[(cells['job_status'] == 'Closed').to_numpy()].sum(),
+        revenue_by_month=revenue_by_month,
+        count_by_region=_sums(cells['region'], {'Count': cells['sites']}),
+        count_by_job_type=_sums(cells['job_type'], {'Count': cells['sites']}),
+        count_by_period=count_by_period,
+        period=period,
+    )
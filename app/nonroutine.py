@@ -1,11 +1,15 @@
-
 import streamlit as st
-import pandas as pd
-import requests
-from io import BytesIO
 import plotly.express as px
 import plotly.graph_objects as go
 from hashlib import sha256
+from app.charts import cached_figure, log_chart_timings
+from app.filters import facet_label
+from app.grid import data_grid
+from app.metrics import ihs_metrics
+from app.workbook import load_workbook, reload_workbook, show_version
+
+# Selectbox columns answered by the dataset's filter index
+FILTER_COLUMNS = ['ihs_id', 'requirement', 'job_status', 'reference', 'region']
 
 # Authentication Setup
 def authenticate_user():
@@ -38,98 +42,68 @@ if not st.session_state.authenticated:
     st.stop()  # Stop execution if the user is not authenticated
 
 # If authenticated, continue with the rest of the app
-# Cache Data Load Function
-@st.cache_data(max_entries=5)  # Keeps the cache to 5 entries
-def load_data(shared_link: str):
-    response = requests.get(shared_link)
-    if response.status_code == 200:
-        try:
-            excel_file = BytesIO(response.content)
-
-            # Load specific sheets
-            ihs_nr_data = pd.read_excel(excel_file, sheet_name="ihs nr data", engine="openpyxl")
-            ihs_matrix = pd.read_excel(excel_file, sheet_name="ihsmatrix", engine="openpyxl")
-
-            # Merge tables on 'ihs_id'
-            merged_data = pd.merge(ihs_nr_data, ihs_matrix, on="ihs_id", how="inner")
-
-            # Ensure 'revenue_month' is datetime and handle invalid dates
-            merged_data['revenue_month'] = pd.to_datetime(merged_data['revenue_month'], errors='coerce')
-
-            # Specify the list of desired columns
-            columns_to_select = [
-                "request_date", "alt_id", "ihs_id", "Regional Manager", 
-                "Zonal Coordinator", "region", "job_type", "requirement", "qty", "unit", 
-                "total", "approval", "approval_date", "job_status", "closure_date", 
-                "execution", "payment_ref", "executor", "qty_used", "unit_used", 
-                "expense", "profit", "revenue_month", "reference"
-            ]
-            
-            # Filter the dataframe to keep only the specified columns
-            filtered_data = merged_data[columns_to_select]
-
-            # Convert 'request_date' to datetime
-            filtered_data['request_date'] = pd.to_datetime(filtered_data['request_date'], errors='coerce')
-
-            return filtered_data
-        except Exception as e:
-            st.error(f"An error occurred while processing the data: {e}")
-            return None
-    else:
-        st.error("Failed to download the file. Please check the shared link.")
-        return None
-
-
-# Shared link to download the file
-shared_link = "https://1drv.ms/x/c/e9d2c9c9c1997df7/ETjIp_jnagZOiSoc6nOXDoMBipfwxe5muyD-TW009pwEeA?download=1"
-
-# Call the function to load the data
-df = load_data(shared_link)
+# Load the merged IHS data and its indexes from one version of the shared workbook
+book = load_workbook()
+if book is None:
+    st.stop()
+df = book.dataset("ihs nr")
+filter_index = book.filter_index("ihs nr", FILTER_COLUMNS)
+request_dates = book.date_index("ihs nr", "request_date")
+cube = book.cube("ihs nr")
+query = book.query("ihs nr")
+revenue_months = book.date_index("ihs nr", "revenue_month")
 
 #####################################################
 ########## UI
 #####################################################
 
 st.title('💼 Non Routine - IHS')
+show_version(book)
 
 
 id_filter, ihs_filter, req_filter, job_status_filter, reference_filter, region_filter, date_filter, revenue_month_filter = st.columns(8, gap='medium')
 
 # Alt ID Search box (using text_input for dynamic filtering)
+# Rows are tracked as sorted row ids into df; None means every row
 with id_filter:
     search_text = st.text_input('Search alt_id', '').strip()
-    filtered_df = df[df['alt_id'].str.contains(search_text, case=False, na=False)] if search_text else df
+    search_rows = book.search_index("ihs nr", "alt_id").rows(search_text) if search_text else None
+
+# Distinct values and job counts of every selectbox column among the searched rows, most frequent
+# first, from one pass over them and cached per search
+facets = book.result("ihs nr", "facets", {'search': search_text.lower()}, lambda: filter_index.facets(search_rows))
 
 # IHS ID Filter
 with ihs_filter:
-    ihs_options = filtered_df['ihs_id'].unique()
-    selected_ihs_id = st.selectbox('Select IHS ID', [''] + list(ihs_options))
+    ihs_options = dict(facets['ihs_id'])
+    selected_ihs_id = st.selectbox('Select IHS ID', [''] + list(ihs_options), format_func=facet_label(ihs_options))
 
 # Requirement Filter
 with req_filter:
-    req_options = filtered_df['requirement'].unique()
-    selected_req = st.selectbox('Select Requirement', [''] + list(req_options))
+    req_options = dict(facets['requirement'])
+    selected_req = st.selectbox('Select Requirement', [''] + list(req_options), format_func=facet_label(req_options))
 
 # Job Status Filter
 with job_status_filter:
-    status_options = filtered_df['job_status'].unique()
-    selected_status = st.selectbox('Select Job Status', [''] + list(status_options))
+    status_options = dict(facets['job_status'])
+    selected_status = st.selectbox('Select Job Status', [''] + list(status_options), format_func=facet_label(status_options))
 
 # Reference Filter
 with reference_filter:
-    ref_options = filtered_df['reference'].unique()
-    selected_ref = st.selectbox('Select Reference', [''] + list(ref_options))
+    ref_options = dict(facets['reference'])
+    selected_ref = st.selectbox('Select Reference', [''] + list(ref_options), format_func=facet_label(ref_options))
 
 # Region Filter
 with region_filter:
-    region_options = filtered_df['region'].unique()
-    selected_region = st.selectbox('Select Region', [''] + list(region_options))
+    region_options = dict(facets['region'])
+    selected_region = st.selectbox('Select Region', [''] + list(region_options), format_func=facet_label(region_options))
 
 # Date Filter
 with date_filter:
-    if not filtered_df['request_date'].isna().all():
-        min_date = filtered_df['request_date'].min().date()
-        max_date = filtered_df['request_date'].max().date()
+    date_bounds = request_dates.bounds(search_rows)
+    if date_bounds is not None:
+        min_date = date_bounds[0].date()
+        max_date = date_bounds[1].date()
 
         # Date inputs for start and end date
         selected_start_date = st.date_input('Start Date', min_value=min_date, max_value=max_date, value=min_date)
@@ -139,16 +113,9 @@ with date_filter:
 
 # Revenue Month Filter
 with revenue_month_filter:
-    if 'revenue_month' in filtered_df and filtered_df['revenue_month'].notna().any():
-        # Convert `revenue_month` to Period (e.g., 'YYYY-MM') for chronological sorting
-        filtered_df['revenue_month_period'] = filtered_df['revenue_month'].dt.to_period('M')
-        
-        # Sort options chronologically and convert to string for display
-        revenue_month_options = (
-            sorted(filtered_df['revenue_month_period'].unique())  # Sort Periods chronologically
-        )
-        revenue_month_options_str = [str(option) for option in revenue_month_options]  # Convert to strings
-        
+    # Months ('YYYY-MM') come from the index's precomputed month keys, already in chronological order
+    revenue_month_options_str = revenue_months.months(search_rows)
+    if revenue_month_options_str:
         # Create the selectbox with sorted options
         selected_revenue_month = st.selectbox('Select Revenue Month', [''] + revenue_month_options_str)
     else:
@@ -157,30 +124,60 @@ with revenue_month_filter:
 
 # Reload Data Button
 if st.button('Reload new data'):
-    st.cache_data.clear()
-
-# Apply Filters to DataFrame
-if selected_ihs_id:
-    filtered_df = filtered_df[filtered_df['ihs_id'] == selected_ihs_id]
-if selected_req:
-    filtered_df = filtered_df[filtered_df['requirement'] == selected_req]
-if selected_status:
-    filtered_df = filtered_df[filtered_df['job_status'] == selected_status]
-if selected_ref:
-    filtered_df = filtered_df[filtered_df['reference'] == selected_ref]
-if selected_region:
-    filtered_df = filtered_df[filtered_df['region'] == selected_region]
-
-# Apply Date Range Filter
-if selected_start_date and selected_end_date:
-    filtered_df = filtered_df[
-        (filtered_df['request_date'].dt.date >= selected_start_date) & 
-        (filtered_df['request_date'].dt.date <= selected_end_date)
-    ]
-
-# Apply Revenue Month Filter
-if selected_revenue_month:
-    filtered_df = filtered_df[filtered_df['revenue_month'].dt.to_period('M').astype(str) == selected_revenue_month]
+    # Only re-parse when the workbook changed on OneDrive
+    if reload_workbook():
+        st.rerun()
+
+selected = {
+    'ihs_id': selected_ihs_id,
+    'requirement': selected_req,
+    'job_status': selected_status,
+    'reference': selected_ref,
+    'region': selected_region,
+}
+
+
+def filter_view(search_rows):
+    # Apply Filters: intersect the row ids of every selected value instead of masking the frame
+    rows = filter_index.select({column: value for column, value in selected.items() if value}, search_rows)
+
+    # Apply Date Range Filter (binary search on the sorted request dates)
+    if selected_start_date and selected_end_date:
+        rows = request_dates.on_days(selected_start_date, selected_end_date, rows)
+
+    # Apply Revenue Month Filter
+    if selected_revenue_month:
+        rows = revenue_months.in_month(selected_revenue_month, rows)
+
+    # Metrics come from the cube cells when every active filter is one of its dimensions. A site
+    # search, an IHS ID or a narrowed date range falls back to rolling up the filtered rows.
+    cube_filters = {column: value for column, value in selected.items() if value and column != 'ihs_id'}
+    if selected_revenue_month:
+        cube_filters['month'] = selected_revenue_month
+    if selected_start_date and selected_end_date:
+        cube_filters['dated'] = True  # The date filter drops jobs without a request date
+    full_date_range = selected_start_date is None or (selected_start_date, selected_end_date) == (min_date, max_date)
+    if not search_text and not selected_ihs_id and full_date_range and cube.covers(cube_filters):
+        cells = cube.select(cube_filters)
+    else:
+        cells = cube.of_rows(df if rows is None else df.take(rows))
+
+    # Request dates are not a cube dimension, so jobs over time count the filtered rows per date,
+    # then per day, week or month depending on the span of those dates
+    count_by_date = query.aggregate(['request_date'], {'Count': ('alt_id', 'count')}, rows)
+    return rows, ihs_metrics(cells, count_by_date)
+
+
+# Row ids and aggregates are cached per filter state and shared by every session, so a popular
+# view (one region, all closed jobs...) is computed once per data version
+view_filters = dict(
+    selected,
+    search=search_text.lower(),
+    start_date=selected_start_date,
+    end_date=selected_end_date,
+    revenue_month=selected_revenue_month,
+)
+rows, metrics = book.result("ihs nr", "dashboard", view_filters, lambda: filter_view(search_rows))
 
 
 
@@ -195,13 +192,10 @@ if selected_revenue_month:
 
 # Metrics Display
 row_metrics = st.columns(2)
-Job_Count = len(filtered_df)
+Job_Count = metrics.job_count
 
 target_profit_perc = 35.0
-total_revenue = filtered_df['total'].sum()  # Sum of revenue (total)
-total_expense = filtered_df['expense'].sum()  # Sum of expenses (cost)
-total_profit = total_revenue - total_expense
-Profit_perc = (total_profit / total_revenue) * 100
+Profit_perc = metrics.profit_percentage
 delta_profit = Profit_perc - target_profit_perc
 
 with row_metrics[0]:
@@ -219,11 +213,8 @@ with row_metrics[1]:
 
 st.markdown('<h1 style="font-size: 30px;">NR</h1>', unsafe_allow_html=True)
 with st.expander('**Data**', icon='📉'):
-    # Display Dataframe
-    if filtered_df is not None:
-        st.dataframe(filtered_df, hide_index=True)
-    else:
-        st.write("No data to display.")
+    # One sorted page of the filtered rows at a time
+    data_grid(book, "ihs nr", rows, key="ihs_grid")
 
 
 
@@ -233,33 +224,32 @@ with st.expander('**Data**', icon='📉'):
 
 
 st.markdown('<h1 style="font-size: 30px;">Metrics</h1>', unsafe_allow_html=True)
-# Keep a copy of the original dataframe for the last four charts
-df_for_last_charts = filtered_df.copy()
-
-# Filter out NaT values from revenue_month for proper date representation for the first two charts only
-filtered_df = filtered_df[filtered_df['revenue_month'].notna()]
-
-# Aggregate Total Revenue for the first two charts
-revenue_by_month = filtered_df.groupby('revenue_month').agg(Total_Revenue=('total', 'sum')).reset_index()
-
-# Profit Percentage Calculation
-revenue_by_month['Profit_Percentage'] = (revenue_by_month['Total_Revenue'] - 
-                                          filtered_df.groupby('revenue_month')['expense'].sum().values) / revenue_by_month['Total_Revenue'] * 100
-
-
-
-fig_total_revenue = go.Figure(go.Bar(
-    x=revenue_by_month['revenue_month'],
-    y=revenue_by_month['Total_Revenue'],
-    name='Total Revenue',
-    marker_color='royalblue'  
-))
-# Update Layout for Total Revenue Bar Chart
-fig_total_revenue.update_layout(
-    title="Total Revenue by Month",
-    xaxis_title="Month",
-    yaxis_title="Total Revenue (in millions)",
-    template="plotly_dark"
+# Revenue, expense and profit percentage per revenue month (jobs without one are left out),
+# for the first two charts
+revenue_by_month = metrics.revenue_by_month
+
+
+
+def total_revenue_chart():
+    fig_total_revenue = go.Figure(go.Bar(
+        x=revenue_by_month['revenue_month'],
+        y=revenue_by_month['Total_Revenue'],
+        name='Total Revenue',
+        marker_color='royalblue'  
+    ))
+    # Update Layout for Total Revenue Bar Chart
+    fig_total_revenue.update_layout(
+        title="Total Revenue by Month",
+        xaxis_title="Month",
+        yaxis_title="Total Revenue (in millions)",
+        template="plotly_dark"
+    )
+    return fig_total_revenue
+
+
+# Figures are rebuilt only when their aggregates or build code change (see app.charts)
+fig_total_revenue = cached_figure(
+    "ihs total revenue", [revenue_by_month[['revenue_month', 'Total_Revenue']]], total_revenue_chart
 )
 
 # Display the Total Revenue Bar Chart
@@ -269,34 +259,41 @@ with st.container():
 
 
 
-fig_profit_percentage = go.Figure(go.Scatter(
-    x=revenue_by_month['revenue_month'],
-    y=revenue_by_month['Profit_Percentage'],
-    name='Profit Percentage',
-    mode='lines+markers',
-    marker_color='maroon'
-))
-
-# Add Target Line at 35% Profit Percentage
-fig_profit_percentage.add_shape(
-    type="line",
-    x0=revenue_by_month['revenue_month'].min(),  # Start of the line (minimum revenue_month)
-    x1=revenue_by_month['revenue_month'].max(),  # End of the line (maximum revenue_month)
-    y0=35,  # Y-value for the target (35%)
-    y1=35,  # Y-value for the target (35%)
-    line=dict(
-        color="royalblue",  # Line color
-        width=2,  # Line width
-        dash="dash",  # Dashed line
-    ),
-)
-
-# Update Layout for Profit Percentage Line Chart
-fig_profit_percentage.update_layout(
-    title="Profit Percentage by Month",
-    xaxis_title="Month",
-    yaxis_title="Profit Percentage",
-    template="plotly_dark"
+def profit_percentage_chart():
+    fig_profit_percentage = go.Figure(go.Scatter(
+        x=revenue_by_month['revenue_month'],
+        y=revenue_by_month['Profit_Percentage'],
+        name='Profit Percentage',
+        mode='lines+markers',
+        marker_color='maroon'
+    ))
+
+    # Add Target Line at 35% Profit Percentage
+    fig_profit_percentage.add_shape(
+        type="line",
+        x0=revenue_by_month['revenue_month'].min(),  # Start of the line (minimum revenue_month)
+        x1=revenue_by_month['revenue_month'].max(),  # End of the line (maximum revenue_month)
+        y0=35,  # Y-value for the target (35%)
+        y1=35,  # Y-value for the target (35%)
+        line=dict(
+            color="royalblue",  # Line color
+            width=2,  # Line width
+            dash="dash",  # Dashed line
+        ),
+    )
+
+    # Update Layout for Profit Percentage Line Chart
+    fig_profit_percentage.update_layout(
+        title="Profit Percentage by Month",
+        xaxis_title="Month",
+        yaxis_title="Profit Percentage",
+        template="plotly_dark"
+    )
+    return fig_profit_percentage
+
+
+fig_profit_percentage = cached_figure(
+    "ihs profit percentage", [revenue_by_month[['revenue_month', 'Profit_Percentage']]], profit_percentage_chart
 )
 
 # Display the Profit Percentage Line Chart
@@ -304,46 +301,46 @@ with st.container():
     st.plotly_chart(fig_profit_percentage, use_container_width=True)
     
 
-# Now, for the last four charts, use the original `df_for_last_charts` to avoid any unintended filtering
+# Now, for the last four charts, use all the selected jobs, with or without a revenue month
 
-# Aggregate Data for the other Charts (Job Distribution by Month, Region, Job Type, Closed Jobs)
-count_by_month = df_for_last_charts.groupby('request_date').agg(Count=('alt_id', 'count')).reset_index()
-count_by_region = df_for_last_charts.groupby('region').agg(Count=('alt_id', 'count')).reset_index()
-count_by_job_type = df_for_last_charts.groupby('job_type').agg(Count=('alt_id', 'count')).reset_index()
+# Data for the other Charts (Job Distribution by Month, Region, Job Type, Closed Jobs)
+count_by_period, period = metrics.count_by_period, metrics.period
+count_by_region = metrics.count_by_region
+count_by_job_type = metrics.count_by_job_type
 
 # Total and Closed Jobs (for the gauge chart)
-total_jobs = len(df_for_last_charts)
-closed_jobs = len(df_for_last_charts[df_for_last_charts['job_status'] == 'Closed'])
+total_jobs = Job_Count
+closed_jobs = metrics.closed_jobs
 
-# Chart 1: Amount of Items by Month (Line Chart - Big)
-fig_amount_by_month = px.line(
-    count_by_month,
+# Chart 1: Amount of Items by Month, or by week or day over shorter spans (Line Chart - Big)
+fig_amount_by_month = cached_figure("ihs jobs by month", [count_by_period, period], lambda: px.line(
+    count_by_period,
     x='request_date',
     y='Count',
-    title="Jobs by Month",
-    labels={'request_date': 'Month', 'Count': 'Item Count'}
-)
+    title=f"Jobs by {period.title()}",
+    labels={'request_date': period.title(), 'Count': 'Item Count'}
+))
 
 # Chart 2: Amount of Items by Region (Bar Chart - Medium)
-fig_amount_by_region = px.bar(
+fig_amount_by_region = cached_figure("ihs jobs by region", [count_by_region], lambda: px.bar(
     count_by_region,
     x='region',
     y='Count',
     title="Jobs by Region",
     labels={'Region': 'Region', 'Count': 'Item Count'}
-)
+))
 
 # Chart 3: Amount of Items by Job Type (Column Chart - Medium)
-fig_amount_by_job_type = px.bar(
+fig_amount_by_job_type = cached_figure("ihs job types", [count_by_job_type], lambda: px.bar(
     count_by_job_type,
     x='job_type',
     y='Count',
     title="Job Type Distribution",
     labels={'job_type': 'Job Type', 'Count': 'Item Count'}
-)
+))
 
 # Chart 4: Closed Jobs from Total Jobs (Gauge Chart - Medium)
-fig_closed_jobs = go.Figure(go.Indicator(
+fig_closed_jobs = cached_figure("ihs closed jobs", [closed_jobs, total_jobs], lambda: go.Figure(go.Indicator(
     mode="gauge+number",
     value=closed_jobs,
     title={'text': "Closed Jobs from Total Jobs"},
@@ -354,7 +351,7 @@ fig_closed_jobs = go.Figure(go.Indicator(
             {'range': [closed_jobs, total_jobs], 'color': 'maroon'}
         ]
     }
-))
+)))
 
 # Layout for the other charts
 charts_1_2 = st.columns(2)  # For Chart 1 and 2
@@ -375,3 +372,5 @@ with charts_3_4[0]:
 # Chart 4: Closed Jobs from Total Jobs (Gauge Chart - Medium)
 with charts_3_4[1]:
     st.plotly_chart(fig_closed_jobs, use_container_width=True)
+
+log_chart_timings("ihs dashboard")
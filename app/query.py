@@ -0,0 +1,159 @@
+"""Row filters and group-bys over a dataset, run by a switchable engine.
+
+Pages describe what they need as row conditions and aggregations. The pandas backend evaluates
+them with boolean masks and groupby; the DuckDB backend as SQL over an Arrow copy of the dataset,
+in process and on every core. NR_QUERY_BACKEND picks one (pandas by default); both give the same
+results (see benchmarks/query_benchmark.py).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from app.snapshot import arrow_safe
+
+QUERY_BACKEND = os.environ.get("NR_QUERY_BACKEND", "pandas")
+
+# A condition is (column, operator) or (column, operator, value):
+#   ("job_status", "==", "Closed"), ("po", "notna"), ("region", "in", ["Lagos", "Kano"]),
+#   ("sav_date", ">=", timestamp)
+# An aggregation maps an output column to (column, function), the function being
+# "sum", "count" (non-blank values) or "size" (rows)
+
+
+class PandasBackend:
+    name = "pandas"
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+
+    def _rows(self, columns: list, rows: np.ndarray) -> pd.DataFrame:
+        # Only the columns a query reads, so a row subset copies no more than it needs
+        frame = self.frame[list(dict.fromkeys(columns))]
+        return frame if rows is None else frame.take(rows)
+
+    @staticmethod
+    def _mask(series: pd.Series, operator: str, value=None) -> pd.Series:
+        if operator == "==":
+            return series == value
+        if operator == "in":
+            return series.isin(value)
+        if operator == ">=":
+            return series >= value
+        if operator == "<=":
+            return series <= value
+        if operator == "isna":
+            return series.isna()
+        if operator == "notna":
+            return series.notna()
+        raise ValueError(f"Unknown operator {operator!r}")
+
+    def select(self, where: list, rows: np.ndarray = None) -> np.ndarray:
+        """Sorted ids of the rows among 'rows' (all rows when None) meeting every condition."""
+        frame = self._rows([condition[0] for condition in where], rows)
+        keep = np.ones(len(frame), dtype=bool)
+        for column, *condition in where:
+            keep &= self._mask(frame[column], *condition).to_numpy()
+        return (np.arange(len(self.frame)) if rows is None else np.asarray(rows))[keep]
+
+    def aggregate(self, by: list, aggregations: dict, rows: np.ndarray = None, dropna: bool = True) -> pd.DataFrame:
+        """Aggregations per group of 'by' over 'rows', one row per group in key order."""
+        frame = self._rows(by + [column for column, _ in aggregations.values()], rows)
+        grouped = frame.groupby(by, dropna=dropna, observed=True)
+        return grouped.agg(**aggregations).reset_index()
+
+
+def _name(column: str) -> str:
+    return '"' + column.replace('"', '""') + '"'
+
+
+# Column holding each row's position in the dataset
+ROW = "__row"
+
+
+class DuckDBBackend:
+    name = "duckdb"
+
+    def __init__(self, frame: pd.DataFrame):
+        import duckdb  # Only needed when this backend is picked
+
+        self._frame = frame
+        safe = arrow_safe(frame)
+        # Columns mixing text and numbers are text in Arrow; conditions on them compare as text too
+        self._as_text = {column for column in frame.columns if not safe[column].equals(frame[column])}
+        table = pa.Table.from_pandas(safe, preserve_index=False)
+        self._table = table.append_column(ROW, pa.array(np.arange(len(frame), dtype=np.int64)))
+        self._database = duckdb.connect()
+
+    def _run(self, sql: str, parameters: list, rows: np.ndarray) -> pd.DataFrame:
+        # A cursor per query: connections must not be shared between the server's threads
+        cursor = self._database.cursor()
+        try:
+            cursor.register("dataset", self._table)
+            if rows is not None:
+                cursor.register("selected", pa.table({ROW: np.asarray(rows, dtype=np.int64)}))
+            return cursor.execute(sql, parameters).df()
+        finally:
+            cursor.close()
+
+    def _condition(self, column: str, operator: str, value=None):
+        if column in self._as_text and value is not None:
+            value = [str(item) for item in value] if operator == "in" else str(value)
+        column = _name(column)
+        if operator in ("==", ">=", "<="):
+            return f"{column} {'=' if operator == '==' else operator} ?", [value]
+        if operator == "in":
+            return f"list_contains(?, {column})", [list(value)]
+        if operator == "isna":
+            return f"{column} IS NULL", []
+        if operator == "notna":
+            return f"{column} IS NOT NULL", []
+        raise ValueError(f"Unknown operator {operator!r}")
+
+    def _where(self, where: list, rows: np.ndarray):
+        clauses, parameters = [], []
+        for condition in where:
+            clause, values = self._condition(*condition)
+            clauses.append(clause)
+            parameters += values
+        if rows is not None:
+            clauses.append(f"{ROW} IN (SELECT {ROW} FROM selected)")
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), parameters
+
+    def select(self, where: list, rows: np.ndarray = None) -> np.ndarray:
+        """Sorted ids of the rows among 'rows' (all rows when None) meeting every condition."""
+        clause, parameters = self._where(where, rows)
+        found = self._run(f"SELECT {ROW} FROM dataset{clause} ORDER BY {ROW}", parameters, rows)
+        return found[ROW].to_numpy(dtype=np.intp)
+
+    def _aggregation(self, column: str, function: str) -> str:
+        if function == "sum":
+            # Same type as a pandas sum: float columns stay float, integers widen to 64 bits
+            kind = "DOUBLE" if pd.api.types.is_float_dtype(self._frame[column]) else "BIGINT"
+            return f"CAST(COALESCE(SUM({_name(column)}), 0) AS {kind})"
+        if function == "count":
+            return f"COUNT({_name(column)})"
+        if function == "size":
+            return "COUNT(*)"
+        raise ValueError(f"Unknown aggregation {function!r}")
+
+    def aggregate(self, by: list, aggregations: dict, rows: np.ndarray = None, dropna: bool = True) -> pd.DataFrame:
+        """Aggregations per group of 'by' over 'rows', one row per group in key order."""
+        where = [(column, "notna") for column in by] if dropna else []
+        clause, parameters = self._where(where, rows)
+        keys = ", ".join(_name(column) for column in by)
+        values = ", ".join(
+            f"{self._aggregation(column, function)} AS {_name(name)}" for name, (column, function) in aggregations.items()
+        )
+        sql = f"SELECT {keys}, {values} FROM dataset{clause} GROUP BY {keys} ORDER BY {keys} NULLS LAST"
+        return self._run(sql, parameters, rows)
+
+
+BACKENDS = {"pandas": PandasBackend, "duckdb": DuckDBBackend}
+
+
+def query_backend(frame: pd.DataFrame, name: str = QUERY_BACKEND):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown query backend {name!r}; use one of {', '.join(BACKENDS)}")
+    return BACKENDS[name](frame)
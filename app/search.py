@@ -0,0 +1,155 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Length of the substrings indexed; shorter queries scan the distinct values instead
+GRAM = 3
+
+# Rank of a match: the whole ID, the start of it, anywhere in it
+EXACT, PREFIX, PARTIAL = 0, 1, 2
+
+
+def grams(text: str) -> set:
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class SubstringIndex:
+    """Case-insensitive trigram index of a text column, built once per dataset version.
+
+    Site IDs repeat across many jobs, so the index is built over the distinct values: each
+    trigram maps to the values containing it, and each value to its rows. A search intersects
+    the query's trigrams, then confirms the few candidate values with a plain substring check.
+    """
+
+    def __init__(self, column: pd.Series):
+        codes, values = pd.factorize(column)
+        # Only text cells can match, like str.contains(..., na=False)
+        self._values = [value.lower() if isinstance(value, str) else None for value in values]
+
+        postings = {}
+        for code, value in enumerate(self._values):
+            if value is not None:
+                for gram in grams(value):
+                    postings.setdefault(gram, []).append(code)
+        self._postings = {gram: np.array(found, dtype=np.int32) for gram, found in postings.items()}
+
+        # Rows of each value, as runs of row ids sorted by value code
+        valid = codes >= 0
+        self._order = np.flatnonzero(valid)[np.argsort(codes[valid], kind="stable")]
+        self._offsets = np.concatenate(([0], np.cumsum(np.bincount(codes[valid], minlength=len(values)))))
+
+    def _candidates(self, text: str) -> np.ndarray:
+        if len(text) < GRAM:
+            return np.arange(len(self._values))
+        found = [self._postings.get(gram) for gram in grams(text)]
+        if any(codes is None for codes in found):
+            return np.empty(0, dtype=np.int32)
+
+        # Intersect from the rarest trigram, which leaves the fewest candidates to carry along
+        found.sort(key=len)
+        candidates = found[0]
+        for codes in found[1:]:
+            candidates = np.intersect1d(candidates, codes, assume_unique=True)
+            if not len(candidates):
+                break
+        return candidates
+
+    def matches(self, text: str) -> dict:
+        """Codes of the values containing 'text', grouped by rank (EXACT, PREFIX, PARTIAL)."""
+        text = text.lower()
+        ranked = {EXACT: [], PREFIX: [], PARTIAL: []}
+        for code in self._candidates(text):
+            value = self._values[code]
+            if value is None or text not in value:
+                continue
+            ranked[EXACT if value == text else PREFIX if value.startswith(text) else PARTIAL].append(code)
+        return ranked
+
+    def _rows_of(self, codes: list) -> np.ndarray:
+        if not codes:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate([self._order[self._offsets[code]:self._offsets[code + 1]] for code in codes]))
+
+    def rows(self, text: str, ranked: bool = False) -> np.ndarray:
+        """Ids of the rows whose value contains 'text', ignoring case. Sorted, or with 'ranked'
+        the rows of exact matches first, then prefix matches, then the rest, each in row order."""
+        matches = self.matches(text)
+        if ranked:
+            return np.concatenate([self._rows_of(matches[rank]) for rank in (EXACT, PREFIX, PARTIAL)])
+        return self._rows_of(matches[EXACT] + matches[PREFIX] + matches[PARTIAL])
+
+
+def words(text: str) -> list:
+    return re.findall(r"\w+", text.lower())
+
+
+def word_grams(tokens: list) -> set:
+    # Pad every word so its first and last letters count as much as the middle ones
+    return set().union(*(grams(f" {token} ") for token in tokens)) if tokens else set()
+
+
+class FuzzyIndex:
+    """Token and trigram index of short free-text entries, such as pricebook faults.
+
+    Entries are ranked by how similar they are to the query: the share of trigrams they have in
+    common (Dice coefficient) and of query words they contain. Both ignore word order and survive
+    a typo or two. Entries that contain the query as typed always rank first.
+    """
+
+    # Weights of trigram similarity and word overlap in the score
+    GRAM_WEIGHT = 0.6
+    WORD_WEIGHT = 0.4
+    # Entries scoring lower are not shown
+    MIN_SCORE = 0.3
+
+    def __init__(self, column: pd.Series):
+        self._text = [value.lower() if isinstance(value, str) else "" for value in column]
+
+        word_postings, gram_postings = {}, {}
+        self._gram_counts = np.zeros(len(self._text), dtype=np.int32)
+        for row, text in enumerate(self._text):
+            tokens = words(text)
+            for token in set(tokens):
+                word_postings.setdefault(token, []).append(row)
+            entry_grams = word_grams(tokens)
+            self._gram_counts[row] = len(entry_grams)
+            for gram in entry_grams:
+                gram_postings.setdefault(gram, []).append(row)
+        self._words = {token: np.array(rows, dtype=np.int32) for token, rows in word_postings.items()}
+        self._grams = {gram: np.array(rows, dtype=np.int32) for gram, rows in gram_postings.items()}
+
+    def _hits(self, postings: dict, keys) -> np.ndarray:
+        # Number of the keys each row holds, from one bincount over their postings
+        found = [postings[key] for key in keys if key in postings]
+        if not found:
+            return np.zeros(len(self._text), dtype=np.int64)
+        return np.bincount(np.concatenate(found), minlength=len(self._text))
+
+    def scores(self, text: str) -> np.ndarray:
+        """Similarity of every entry to 'text', above 1 for entries containing it as typed."""
+        tokens = words(text)
+        query_grams = word_grams(tokens)
+        if not query_grams:
+            return np.zeros(len(self._text))
+
+        shared = self._hits(self._grams, query_grams)
+        dice = 2 * shared / (len(query_grams) + np.maximum(self._gram_counts, 1))
+        overlap = self._hits(self._words, set(tokens)) / len(set(tokens))
+        score = self.GRAM_WEIGHT * dice + self.WORD_WEIGHT * overlap
+
+        # A query word of three letters or more puts its inner trigrams in every entry containing
+        # the query, so only entries sharing a trigram need checking; otherwise check them all
+        needle = text.lower()
+        long_word = any(len(token) >= GRAM for token in tokens)
+        for row in np.flatnonzero(shared) if long_word else range(len(self._text)):
+            if needle in self._text[row]:
+                score[row] += 1
+        return score
+
+    def search(self, text: str, limit: int = 25) -> np.ndarray:
+        """Ids of the best 'limit' matching rows (all of them when None), best first and in row
+        order among equals."""
+        score = self.scores(text)
+        rows = np.flatnonzero(score >= self.MIN_SCORE)
+        return rows[np.argsort(-score[rows], kind="stable")][:limit]
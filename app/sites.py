@@ -0,0 +1,51 @@
+import pandas as pd
+
+
+def _text(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def site_key(column: pd.Series) -> pd.Series:
+    """Site IDs as text, so a sheet storing 1001 as a number and one storing it as text (or a
+    column made text for mixing both) still match: 1001, 1001.0 and '1001' all become '1001'."""
+    if pd.api.types.infer_dtype(column, skipna=True) == "string":
+        return column
+    return column.astype(object).map(_text, na_action="ignore")
+
+
+def build_lookup(matrix: pd.DataFrame, key: str):
+    """Site matrix indexed by its site ID (see site_key), one row per site.
+
+    Returns the lookup and the site IDs that appeared more than once. An inner merge would
+    repeat every job of such a site once per duplicate; the lookup keeps the first row instead.
+    """
+    keys = site_key(matrix[key])
+    matrix, keys = matrix[keys.notna()], keys[keys.notna()]
+    duplicated = keys.duplicated()
+    duplicates = matrix.loc[duplicated, key].unique().tolist()
+    lookup = matrix[~duplicated].drop(columns=key)
+    lookup.index = pd.Index(keys[~duplicated], name=key)
+    return lookup, duplicates
+
+
+def join_sites(jobs: pd.DataFrame, lookup: pd.DataFrame, key: str) -> pd.DataFrame:
+    """Inner join of jobs to a site lookup through its index, in job order and keeping the jobs' index."""
+    positions = lookup.index.get_indexer(site_key(jobs[key]))
+    matched = positions >= 0
+
+    left = jobs[matched]
+    right = lookup.iloc[positions[matched]].set_axis(left.index)
+
+    # Same suffixes as pd.merge for columns found in both sheets
+    overlap = left.columns.intersection(right.columns)
+    if len(overlap):
+        left = left.rename(columns={column: f"{column}_x" for column in overlap})
+        right = right.rename(columns={column: f"{column}_y" for column in overlap})
+    return pd.concat([left, right], axis=1)
+
+
+def sample(values: list, limit: int = 5) -> str:
+    shown = ", ".join(str(value) for value in values[:limit])
+    return shown + (f" and {len(values) - limit} more" if len(values) > limit else "")
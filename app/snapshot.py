@@ -0,0 +1,79 @@
+import json
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+import pyarrow.feather as feather
+
+# Local snapshots of the parsed sheets, so a restarted server does not parse the workbook again
+SNAPSHOT_DIR = os.environ.get("NR_SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), ".snapshots"))
+LATEST_FILE = "latest.json"
+
+
+def _file_name(sheet: str) -> str:
+    return sheet.replace(" ", "_") + ".arrow"
+
+
+def arrow_safe(frame: pd.DataFrame) -> pd.DataFrame:
+    """Frame Arrow can convert. Excel columns often mix numbers and text (e.g. site IDs), and
+    Arrow needs one type per column, so the values of mixed columns become strings."""
+    frame = frame.copy(deep=False)
+    for column in frame.columns:
+        values = frame[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            if not pd.api.types.infer_dtype(values.cat.categories, skipna=True).startswith("mixed"):
+                continue
+            values = values.astype(object)
+        elif values.dtype != object:
+            continue
+        if pd.api.types.infer_dtype(values, skipna=True).startswith("mixed"):
+            frame[column] = values.where(values.isna(), values.astype(str))
+    # Arrow column names must be strings
+    frame.columns = [str(column) for column in frame.columns]
+    return frame
+
+
+def save_snapshot(content_hash: str, sheets: dict, meta: dict, directory: str = SNAPSHOT_DIR):
+    """Write every sheet as an uncompressed Arrow IPC file and point 'latest' at it."""
+    os.makedirs(directory, exist_ok=True)
+
+    # Write into a temporary folder first, so a crash never leaves a half-written snapshot
+    staging = tempfile.mkdtemp(dir=directory)
+    for name, frame in sheets.items():
+        feather.write_feather(arrow_safe(frame), os.path.join(staging, _file_name(name)), compression="uncompressed")
+    with open(os.path.join(staging, "meta.json"), "w") as file:
+        json.dump({**meta, "content_hash": content_hash, "sheets": list(sheets)}, file)
+
+    target = os.path.join(directory, content_hash)
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(staging, target)
+
+    latest_tmp = os.path.join(directory, LATEST_FILE + ".tmp")
+    with open(latest_tmp, "w") as file:
+        json.dump({"content_hash": content_hash}, file)
+    os.replace(latest_tmp, os.path.join(directory, LATEST_FILE))
+
+    # Keep only the newest snapshot
+    for entry in os.listdir(directory):
+        path = os.path.join(directory, entry)
+        if os.path.isdir(path) and entry != content_hash:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load_snapshot(directory: str = SNAPSHOT_DIR):
+    """Memory-map the latest snapshot. Returns (sheets, meta) or None when there is none."""
+    try:
+        with open(os.path.join(directory, LATEST_FILE)) as file:
+            content_hash = json.load(file)["content_hash"]
+        folder = os.path.join(directory, content_hash)
+        with open(os.path.join(folder, "meta.json")) as file:
+            meta = json.load(file)
+    except (OSError, ValueError, KeyError):
+        return None
+
+    sheets = {
+        name: feather.read_table(os.path.join(folder, _file_name(name)), memory_map=True).to_pandas()
+        for name in meta["sheets"]
+    }
+    return sheets, meta
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+# Buckets a time series can be drawn with, finest first, and their pandas period frequency
+BUCKETS = {"day": "D", "week": "W", "month": "M"}
+
+# Most buckets a series is drawn with before moving to a coarser bucket
+TARGET_POINTS = 180
+
+# Points kept when even monthly buckets are more; the rest are dropped by LTTB
+MAX_POINTS = 240
+
+
+def pick_bucket(start, end) -> str:
+    """Finest bucket giving at most TARGET_POINTS buckets from 'start' through 'end'."""
+    for bucket, frequency in BUCKETS.items():
+        if (pd.Period(end, frequency) - pd.Period(start, frequency)).n + 1 <= TARGET_POINTS:
+            return bucket
+    return "month"
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """Positions of the 'points' samples of (x, y) kept by Largest-Triangle-Three-Buckets.
+
+    The first and last samples are always kept. The rest are split into points - 2 buckets
+    and each contributes the sample forming the largest triangle with the sample kept before
+    it and the average of the next bucket, which keeps the peaks and dips of the series.
+    """
+    count = len(x)
+    if points >= count or points < 3:
+        return np.arange(count)
+
+    x = x.astype(float)
+    y = y.astype(float)
+    edges = np.linspace(1, count - 1, points - 1).astype(int)
+    kept = np.empty(points, dtype=np.intp)
+    kept[0], kept[-1] = 0, count - 1
+
+    previous = 0
+    for i in range(points - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Average of the next bucket (the last sample for the last bucket)
+        after = slice(stop, edges[i + 2]) if i + 2 < len(edges) else slice(count - 1, count)
+        next_x, next_y = x[after].mean(), y[after].mean()
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = kept[i + 1] = start + int(np.argmax(area))
+    return kept
+
+
+def bucketed(counts: pd.DataFrame, date: str, value: str):
+    """Sum of 'value' per day, week or month of 'date', with the bucket picked from the span of
+    the dates; downsampled to MAX_POINTS with LTTB beyond that. Returns (series frame, bucket),
+    the frame holding each bucket's start date in 'date'."""
+    dates = counts[date]
+    if dates.isna().all():
+        return counts[[date, value]].iloc[:0], "month"
+
+    bucket = pick_bucket(dates.min(), dates.max())
+    starts = dates.dt.to_period(BUCKETS[bucket]).dt.start_time
+    series = counts[value].groupby(starts.rename(date)).sum().reset_index()
+    if len(series) > MAX_POINTS:
+        # Dates in their own unit: a cast to nanoseconds would wrap years past 2262 around
+        kept = lttb(series[date].to_numpy().view(np.int64), series[value].to_numpy(), MAX_POINTS)
+        series = series.iloc[kept].reset_index(drop=True)
+    return series, bucket
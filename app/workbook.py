@@ -0,0 +1,586 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from hashlib import sha256
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import requests
+import streamlit as st
+
+from app.cache import discard_mentioning, filter_key, namespace, results
+from app.cube import MetricsCube
+from app.dtypes import append_compact, compact, memory_report
+from app.excel import read_sheets
+from app.filters import DateIndex, FilterIndex
+from app.grid import SortIndex
+from app.ingest import RollupSpec, apply_rollup_delta, diff, fingerprint, new_positions, rollup
+from app.ledger import PendingLedger, ReceivablesLedger
+from app.query import QUERY_BACKEND, query_backend
+from app.search import FuzzyIndex, SubstringIndex
+from app.sites import build_lookup, join_sites, sample
+from app.snapshot import arrow_safe, load_snapshot, save_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Shared link to download the file
+WORKBOOK_URL = "https://1drv.ms/x/c/e9d2c9c9c1997df7/ETjIp_jnagZOiSoc6nOXDoMBipfwxe5muyD-TW009pwEeA?download=1"
+
+# Worker processes for parsing the workbook's sheets concurrently. Defaults to the CPUs this process may
+# run on, which in a container can be far fewer than os.cpu_count(), or 1 where the OS does not say
+PARSE_WORKERS = int(os.environ.get(
+    "NR_PARSE_WORKERS", len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else 1
+))
+
+# Seconds between background checks for a new workbook; 0 turns the refresher off
+REFRESH_INTERVAL = int(os.environ.get("NR_REFRESH_INTERVAL", "300"))
+
+# Seconds to wait for OneDrive to connect or send data before a download fails
+DOWNLOAD_TIMEOUT = int(os.environ.get("NR_DOWNLOAD_TIMEOUT", "60"))
+
+# Every sheet the app reads from the workbook
+SHEETS = ["ihs nr data", "ihsmatrix", "atc nr data", "atcmatrix", "ihspricebook"]
+
+# Columns kept by each page
+IHS_NR_COLUMNS = [
+    "request_date", "alt_id", "ihs_id", "Regional Manager",
+    "Zonal Coordinator", "region", "job_type", "requirement", "qty", "unit",
+    "total", "approval", "approval_date", "job_status", "closure_date",
+    "execution", "payment_ref", "executor", "qty_used", "unit_used",
+    "expense", "profit", "revenue_month", "reference"
+]
+IHS_TRACKER_COLUMNS = [
+    'request_date', 'ihs_id', 'alt_id', 'fault', 'approval', 'total',
+    'job_status', 'Regional Manager', 'Cluster'
+]
+ATC_NR_COLUMNS = [
+    'jobcode', 'category', 'description', 'job', 'atc_id', 'region',
+    'state', 'cluster', 'regional_supervisor', 'year', 'sav_date',
+    'month', 'qty', 'unit', 'revenue', 'qty_used', 'unit_used', 'expense',
+    'rs_proposed', 'job_status', 'sav_doc', 'po', 'invoice',
+    'status', 'comment'
+]
+PRICEBOOK_COLUMNS = ['fault', 'Approval', 'InHouse', 'Severity', 'Essense']
+VENDOR_PRICEBOOK_COLUMNS = ['fault', 'InHouse']
+
+# Columns read from each sheet: everything any page uses. A page column that lives in the other
+# sheet of a merge is simply not found in this one's header.
+SHEET_COLUMNS = {
+    "ihs nr data": set(IHS_NR_COLUMNS + IHS_TRACKER_COLUMNS),
+    "ihsmatrix": set(IHS_NR_COLUMNS + IHS_TRACKER_COLUMNS),
+    "atc nr data": set(ATC_NR_COLUMNS),
+    "atcmatrix": set(ATC_NR_COLUMNS),
+    "ihspricebook": set(PRICEBOOK_COLUMNS + VENDOR_PRICEBOOK_COLUMNS),
+}
+
+# Parse configuration stored with each snapshot; a snapshot parsed with other columns is not restored
+SNAPSHOT_COLUMNS = {name: sorted(SHEET_COLUMNS[name]) for name in SHEETS}
+
+
+class WorkbookError(Exception):
+    pass
+
+
+@dataclass
+class JobDataset:
+    """Dataset built row by row from a job sheet joined to its site matrix. Each job row maps to
+    its own output rows, so a new version only has to build the rows of added or removed jobs."""
+    jobs: str
+    matrix: str
+    build: object  # (jobs frame, book) -> dataset rows
+    scope: str  # Cache namespace the dataset and its derived results live in
+
+    @property
+    def sheets(self):
+        return [self.jobs, self.matrix]
+
+
+@dataclass
+class SheetDataset:
+    """Dataset read from a single sheet."""
+    sheet: str
+    build: object  # (sheet frame) -> dataset
+    scope: str
+
+    @property
+    def sheets(self):
+        return [self.sheet]
+
+
+class Workbook:
+    """One downloaded version of the workbook, parsed once and shared by every page.
+
+    Built datasets and site lookups are cached in their scope's namespace (see app.cache) under
+    the content digest of their sheets, so a new version reuses everything whose sheets did not change.
+    """
+
+    def __init__(self, sheets: dict, version: str, number: int = 1, previous=None):
+        self.version = version
+        self.number = number  # Increases by one with every new version the server loads
+        self.loaded_at = datetime.now()
+        self._sheets = sheets
+        self._datasets = {}  # name -> (frame, row hashes, rollup, sheet position of each row)
+        self._hashes = {}  # Row hashes of each sheet
+        self._lookups = {}
+        self.issues = []  # Data problems found while building, shown on the pages
+        self._previous = previous  # Version the job datasets are updated from, dropped after build_all
+        self._lock = threading.RLock()  # Datasets can build on other datasets
+
+    def sheet(self, name: str) -> pd.DataFrame:
+        # Shallow copy so a page can add or replace columns without touching the shared frame
+        return self._sheets[name].copy(deep=False)
+
+    def _entry(self, name: str):
+        with self._lock:
+            if name not in self._datasets:
+                spec = DATASETS[name]
+                key = ("dataset", name, self.dataset_digest(name))
+                self._datasets[name] = namespace(spec.scope).get_or_build(key, lambda: self._build(name, spec))
+            return self._datasets[name]
+
+    def dataset(self, name: str) -> pd.DataFrame:
+        # Build each page dataset once per version, then hand out shallow copies
+        return self._entry(name)[0].copy(deep=False)
+
+    def rollup(self, name: str) -> pd.DataFrame:
+        """Revenue, expense and row count per group of a job dataset (see ROLLUPS)."""
+        return self._entry(name)[2]
+
+    def cube(self, name: str) -> MetricsCube:
+        """Metrics cube over a job dataset's rollup, for dashboards filtering on its keys."""
+        return self.derived(
+            name, "cube", lambda frame: MetricsCube(ROLLUPS[name], self.rollup(name), CUBE_MONTHS.get(name))
+        )
+
+    def derived(self, name: str, kind, build):
+        """build(dataset frame), cached in the dataset's namespace for as long as its sheets
+        do not change. 'kind' tells apart the different results derived from one dataset."""
+        key = (kind, name, self.dataset_digest(name))
+        return namespace(DATASETS[name].scope).get_or_build(key, lambda: build(self._entry(name)[0]))
+
+    def view_key(self, name: str, view: str, filters: dict) -> tuple:
+        """Key of one filter state of a view of a dataset: the dataset digest, the view name and
+        filter_key(filters)."""
+        return (name, self.dataset_digest(name), view, filter_key(filters))
+
+    def result(self, name: str, view: str, filters: dict, build):
+        """build() for one filter state of a view of a dataset, shared by every session that sets
+        the same filters. Cached in the scope's result namespace under view_key()."""
+        return results(DATASETS[name].scope).get_or_build(self.view_key(name, view, filters), build)
+
+    def filter_index(self, name: str, columns: list) -> FilterIndex:
+        """Row-id index of a dataset's selectbox columns (see app.filters)."""
+        return self.derived(name, ("filters", tuple(columns)), lambda frame: FilterIndex(frame, columns))
+
+    def date_index(self, name: str, column: str) -> DateIndex:
+        """Rows of a dataset sorted by one of its date columns, for range and month filters."""
+        return self.derived(name, ("dates", column), lambda frame: DateIndex(frame[column]))
+
+    def sort_index(self, name: str, column: str) -> SortIndex:
+        """Rank of every row of a dataset sorted by one column, for paging the data grids."""
+        return self.derived(name, ("sort", column), lambda frame: SortIndex(frame[column]))
+
+    def pending_ledger(self, name: str, by: str) -> PendingLedger:
+        """Closed jobs awaiting their SAV document, totalled per 'by' supervisor and PO status."""
+        return self.derived(name, ("pending", by), lambda frame: PendingLedger(frame, by))
+
+    def receivables_ledger(self, name: str, by: str) -> ReceivablesLedger:
+        """Running revenue per 'by' supervisor over sorted SAV dates, for date-range totals."""
+        return self.derived(name, ("receivables", by), lambda frame: ReceivablesLedger(frame, by))
+
+    def query(self, name: str):
+        """Filter and group-by engine over a dataset, picked by NR_QUERY_BACKEND (see app.query)."""
+        return self.derived(name, ("query", QUERY_BACKEND), query_backend)
+
+    def search_index(self, name: str, column: str) -> SubstringIndex:
+        """Trigram index of a dataset's site-ID column for partial-ID searches (see app.search)."""
+        return self.derived(name, ("search", column), lambda frame: SubstringIndex(frame[column]))
+
+    def fuzzy_index(self, name: str, column: str) -> FuzzyIndex:
+        """Token and trigram index of a dataset's free-text column, ranked by similarity."""
+        return self.derived(name, ("fuzzy", column), lambda frame: FuzzyIndex(frame[column]))
+
+    def row_hashes(self, sheet: str) -> np.ndarray:
+        with self._lock:
+            if sheet not in self._hashes:
+                self._hashes[sheet] = fingerprint(self._sheets[sheet])
+            return self._hashes[sheet]
+
+    def digest(self, sheet: str) -> str:
+        """Content hash of one sheet."""
+        return sha256(self.row_hashes(sheet).tobytes()).hexdigest()
+
+    def dataset_digest(self, name: str) -> str:
+        """Content hash of the sheets a dataset is built from; equal digests give equal datasets."""
+        return sha256("".join(self.digest(sheet) for sheet in DATASETS[name].sheets).encode()).hexdigest()
+
+    def digests(self) -> set:
+        """Content hashes of every sheet and dataset of this version, which cache keys are built on."""
+        return {self.digest(sheet) for sheet in SHEETS} | {self.dataset_digest(name) for name in DATASETS}
+
+    def site_lookup(self, sheet: str, key: str, scope: str) -> pd.DataFrame:
+        """Matrix sheet deduplicated and indexed by site ID. Cached on the sheet's content,
+        so a change to the jobs sheet alone never processes the matrix again."""
+        with self._lock:
+            if (sheet, key) not in self._lookups:
+                cache_key = ("sites", sheet, key, self.digest(sheet))
+                lookup, duplicates = namespace(scope).get_or_build(
+                    cache_key, lambda: build_lookup(self._sheets[sheet], key)
+                )
+                if duplicates:
+                    logger.warning("%s has duplicate %s values: %s", sheet, key, sample(duplicates))
+                    self.issues.append(
+                        f"'{sheet}' lists {len(duplicates)} {key} value(s) more than once ({sample(duplicates)}). "
+                        f"Only the first row of each is used."
+                    )
+                self._lookups[(sheet, key)] = lookup
+            return self._lookups[(sheet, key)]
+
+    def _build(self, name: str, spec):
+        if isinstance(spec, SheetDataset):
+            return compact(spec.build(self._sheets[spec.sheet])), None, None, None
+
+        updated = self._update_from_previous(name, spec)
+        if updated is not None:
+            return updated
+
+        # Hash and roll up the rows as built, so the deltas of later versions compare like with like.
+        # A built frame keeps the index of its job rows, i.e. their positions in the sheet.
+        frame = spec.build(self._sheets[spec.jobs], self)
+        totals = rollup(frame, ROLLUPS[name]) if name in ROLLUPS else None
+        return compact(frame.reset_index(drop=True)), fingerprint(frame), totals, frame.index.to_numpy()
+
+    def _update_from_previous(self, name: str, spec: JobDataset):
+        previous = self._previous
+        if previous is None or name not in previous._datasets:
+            return None
+        # A new site matrix can change any joined row
+        if previous.digest(spec.matrix) != self.digest(spec.matrix):
+            return None
+        delta = diff(previous.row_hashes(spec.jobs), self.row_hashes(spec.jobs))
+        if not delta.small:
+            return None
+
+        removed = spec.build(previous._sheets[spec.jobs].iloc[delta.removed], self)
+        added = spec.build(self._sheets[spec.jobs].iloc[delta.added], self)
+        old, old_hashes, old_totals, old_positions = previous._datasets[name]
+
+        # Keep the rows of jobs still in the sheet, at their jobs' new positions
+        positions = new_positions(previous.row_hashes(spec.jobs), self.row_hashes(spec.jobs))[old_positions]
+        kept = positions >= 0
+
+        # Removed rows that build differently from the stored ones (e.g. a column changed type) force a full rebuild
+        if not np.array_equal(np.sort(old_hashes[~kept]), np.sort(fingerprint(removed))):
+            return None
+        totals = apply_rollup_delta(old_totals, added, removed, ROLLUPS[name]) if name in ROLLUPS else None
+        logger.info("Updated %s from version %s: %s", name, previous.number, delta)
+
+        # Restore sheet order, so the rows come out as a full rebuild would give them
+        frame = append_compact(old[kept], added)
+        positions = np.concatenate([positions[kept], added.index.to_numpy()])
+        hashes = np.concatenate([old_hashes[kept], fingerprint(added)])
+        order = np.argsort(positions, kind="stable")
+        return frame.take(order).reset_index(drop=True), hashes[order], totals, positions[order]
+
+    def build_all(self):
+        for name in DATASETS:
+            self.dataset(name)
+        self._previous = None
+
+    def memory_report(self) -> pd.DataFrame:
+        """Bytes per column of every dataset built so far."""
+        with self._lock:
+            reports = {name: memory_report(entry[0]) for name, entry in self._datasets.items()}
+        if not reports:
+            return pd.DataFrame(columns=["dtype", "bytes", "share"])
+        return pd.concat(reports, names=["dataset", "column"])
+
+
+class WorkbookService:
+    """Downloads the workbook once per version and keeps the parsed sheets in memory."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._workbook = None
+        self._lock = threading.RLock()
+
+        # Validators of the last successful download, used for conditional requests
+        self.etag = None
+        self.last_modified = None
+        self.content_hash = None
+
+        # Seconds spent on the last openpyxl parse and the last snapshot load
+        self.timings = {}
+
+        self._versions = 0
+        self._refresher = None
+
+    @property
+    def current(self):
+        """The workbook pages are served right now, or None before the first load."""
+        return self._workbook
+
+    def _swap(self, sheets: dict, content_hash: str):
+        # Build every page dataset before publishing, then replace the reference in one step,
+        # so a rerun sees either the old version or the new one, never a mix
+        previous = self._workbook
+        book = Workbook(sheets, content_hash[:12], self._versions + 1, previous=previous)
+        book.build_all()
+        self._versions += 1
+        self._workbook = book
+
+        if previous is not None:
+            # Entries keyed on sheets or datasets that changed are never read again; a rerun still on
+            # the previous version rebuilds what it needs
+            discard_mentioning(previous.digests() - book.digests())
+
+    def download(self):
+        """(content, ETag, Last-Modified) of the workbook, or None when our copy is still current.
+        The validators are only kept once that content is loaded (see refresh())."""
+        # Ask the server to skip the body when our copy is still current
+        headers = {}
+        if self._workbook is not None:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+
+        try:
+            response = requests.get(self.url, headers=headers, timeout=DOWNLOAD_TIMEOUT)
+        except requests.RequestException as e:
+            raise WorkbookError("Failed to reach OneDrive. Please try again later.") from e
+        if response.status_code == 304:
+            return None
+        if response.status_code != 200:
+            raise WorkbookError("Failed to download the file. Please check the shared link.")
+
+        return response.content, response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+    def parse(self, content: bytes, columns: dict = SHEET_COLUMNS, workers: int = PARSE_WORKERS) -> dict:
+        """Parse every sheet the app uses. With 'columns' (sheet -> column names) only those
+        columns are built, streaming the rows on 'workers' processes; with None every column
+        is read via read_excel."""
+        start = time.perf_counter()
+        if columns is None:
+            # Open the file once and read every sheet from the same handle
+            excel_file = pd.ExcelFile(BytesIO(content), engine="openpyxl")
+            sheets = {name: excel_file.parse(name) for name in SHEETS}
+        else:
+            sheets = read_sheets(content, {name: columns[name] for name in SHEETS}, workers)
+        # Give the sheets the types a snapshot restores them with, so both paths build the same datasets
+        sheets = {name: arrow_safe(frame) for name, frame in sheets.items()}
+        self.timings["parse"] = time.perf_counter() - start
+        logger.info("Parsed workbook with openpyxl in %.2fs (%s workers)", self.timings["parse"], workers)
+        return sheets
+
+    def restore(self) -> bool:
+        """Serve the last snapshot written to disk, if any. Returns True when one was loaded;
+        a damaged snapshot, or one parsed with other columns, is skipped."""
+        start = time.perf_counter()
+        try:
+            snapshot = load_snapshot()
+            if snapshot is None:
+                return False
+            sheets, meta = snapshot
+            if meta.get("columns") != SNAPSHOT_COLUMNS:
+                logger.info("Skipping workbook snapshot parsed with other columns")
+                return False
+            self._swap(sheets, meta["content_hash"])
+            self.content_hash = meta["content_hash"]
+        except Exception:
+            logger.exception("Could not restore the workbook snapshot")
+            return False
+
+        self.etag = meta.get("etag")
+        self.last_modified = meta.get("last_modified")
+        self.timings["snapshot load"] = time.perf_counter() - start
+        logger.info("Loaded workbook snapshot %s in %.2fs", self._workbook.version, self.timings["snapshot load"])
+        return True
+
+    def _refresh_in_background(self):
+        try:
+            if self.refresh():
+                logger.info("Background refresh loaded workbook version %s", self._workbook.number)
+        except Exception:
+            logger.exception("Background refresh of the workbook failed")
+
+    def start_refresher(self, interval: int):
+        """Poll OneDrive every 'interval' seconds on a daemon thread, off the request path."""
+        if self._refresher is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                self._refresh_in_background()
+
+        self._refresher = threading.Thread(target=run, name="workbook-refresher", daemon=True)
+        self._refresher.start()
+
+    def refresh(self) -> bool:
+        """Revalidate the workbook and return True when a new version was loaded."""
+        # Download without the lock, so a slow request never holds up a reload or another refresh
+        downloaded = self.download()
+        if downloaded is None:
+            return False  # 304 Not Modified
+        content, etag, last_modified = downloaded
+
+        with self._lock:
+            # Servers without validators still send the body; skip parsing if the bytes are the same
+            content_hash = sha256(content).hexdigest()
+            if self._workbook is not None and content_hash == self.content_hash:
+                self.etag, self.last_modified = etag, last_modified
+                return False
+
+            sheets = self.parse(content)
+            self._swap(sheets, content_hash)
+            # Only now: validators kept after a failed parse would answer every later check with a 304
+            self.content_hash, self.etag, self.last_modified = content_hash, etag, last_modified
+
+            try:
+                save_snapshot(
+                    content_hash, sheets,
+                    {"etag": self.etag, "last_modified": self.last_modified, "columns": SNAPSHOT_COLUMNS},
+                )
+            except Exception:
+                logger.exception("Could not write the workbook snapshot")
+            return True
+
+    def workbook(self) -> Workbook:
+        # Readers never wait on a refresh once a version is loaded
+        book = self._workbook
+        if book is not None:
+            return book
+
+        with self._lock:
+            if self._workbook is None:
+                # After a restart, serve the last snapshot right away and check OneDrive off the request path
+                if self.restore():
+                    threading.Thread(target=self._refresh_in_background, daemon=True).start()
+                else:
+                    self.refresh()
+            return self._workbook
+
+
+#####################################################
+########## PAGE DATASETS
+#####################################################
+
+def ihs_nr(jobs: pd.DataFrame, book: Workbook) -> pd.DataFrame:
+    # Join jobs to their sites on 'ihs_id'
+    merged_data = join_sites(jobs, book.site_lookup("ihsmatrix", "ihs_id", "ihs"), "ihs_id")
+
+    # Ensure 'revenue_month' is datetime and handle invalid dates
+    merged_data['revenue_month'] = pd.to_datetime(merged_data['revenue_month'], errors='coerce')
+
+    # Filter the dataframe to keep only the specified columns
+    filtered_data = merged_data[IHS_NR_COLUMNS].copy()
+
+    # Convert 'request_date' to datetime
+    filtered_data['request_date'] = pd.to_datetime(filtered_data['request_date'], errors='coerce')
+    return filtered_data
+
+
+def ihs_tracker(jobs: pd.DataFrame, book: Workbook) -> pd.DataFrame:
+    return join_sites(jobs, book.site_lookup("ihsmatrix", "ihs_id", "ihs"), "ihs_id")[IHS_TRACKER_COLUMNS]
+
+
+def atc_nr(jobs: pd.DataFrame, book: Workbook) -> pd.DataFrame:
+    # Join jobs to their sites on 'atc_id'
+    merged_data = join_sites(jobs, book.site_lookup("atcmatrix", "atc_id", "atc"), "atc_id")
+
+    # Apply pd.to_datetime() to each date column
+    date_cols = ['month', 'invoice', 'sav_date']
+    merged_data[date_cols] = merged_data[date_cols].apply(pd.to_datetime, errors='coerce')
+
+    return merged_data[ATC_NR_COLUMNS]
+
+
+def pricebook(sheet: pd.DataFrame) -> pd.DataFrame:
+    return sheet[PRICEBOOK_COLUMNS]
+
+
+def vendor_pricebook(sheet: pd.DataFrame) -> pd.DataFrame:
+    return sheet[VENDOR_PRICEBOOK_COLUMNS]
+
+
+DATASETS = {
+    "ihs nr": JobDataset("ihs nr data", "ihsmatrix", ihs_nr, scope="ihs"),
+    "ihs tracker": JobDataset("ihs nr data", "ihsmatrix", ihs_tracker, scope="ihs"),
+    "atc nr": JobDataset("atc nr data", "atcmatrix", atc_nr, scope="atc"),
+    "pricebook": SheetDataset("ihspricebook", pricebook, scope="pricebook"),
+    "vendor pricebook": SheetDataset("ihspricebook", vendor_pricebook, scope="pricebook"),
+}
+
+# Revenue, expense and count aggregates kept up to date with each job dataset.
+# The IHS one is the dashboard's metrics cube: 'dated' tells apart jobs without a request date,
+# which its date filter always drops, and 'sites' counts the jobs with an alt_id, as its charts do.
+ROLLUPS = {
+    "ihs nr": RollupSpec(
+        keys=["revenue_month", "region", "job_type", "job_status", "requirement", "reference", "dated"],
+        values=["total", "expense", "profit", "sites"],
+        derived={
+            "dated": lambda frame: frame["request_date"].notna(),
+            "sites": lambda frame: frame["alt_id"].notna(),
+        },
+    ),
+    "atc nr": RollupSpec(keys=["regional_supervisor", "job_status"], values=["revenue", "expense"]),
+}
+
+# Cube dimension that can be filtered by month
+CUBE_MONTHS = {"ihs nr": "revenue_month"}
+
+
+#####################################################
+########## STREAMLIT ACCESS
+#####################################################
+
+@st.cache_resource
+def workbook_service() -> WorkbookService:
+    # One service per server process, shared by every page and session
+    service = WorkbookService(WORKBOOK_URL)
+    if REFRESH_INTERVAL > 0:
+        service.start_refresher(REFRESH_INTERVAL)
+    return service
+
+
+def load_workbook():
+    """The workbook version a rerun reads from. Take every dataset and index of one rerun from
+    it, so they agree even if the refresher swaps in a new version halfway through."""
+    try:
+        return workbook_service().workbook()
+    except WorkbookError as e:
+        st.error(str(e))
+        return None
+    except Exception as e:
+        st.error(f"An error occurred while processing the data: {e}")
+        return None
+
+
+def reload_workbook() -> bool:
+    """Revalidate the workbook now. Caches are left alone: a new version drops only the entries
+    of the sheets it changed (see WorkbookService._swap), and a 304 keeps everything warm."""
+    try:
+        changed = workbook_service().refresh()
+    except WorkbookError as e:
+        st.error(str(e))
+        return False
+    except Exception as e:
+        st.error(f"An error occurred while processing the data: {e}")
+        return False
+
+    st.toast("Loaded a new version of the data." if changed else "Data is already up to date.")
+    return changed
+
+
+def show_version(book: Workbook = None):
+    """Caption with the data version; pass the rerun's workbook so it names the version shown."""
+    book = book if book is not None else workbook_service().current
+    if book is not None:
+        st.caption(f"Data version {book.number} ({book.version}) · loaded {book.loaded_at:%d %b %Y %H:%M}")
+        for issue in book.issues:
+            st.warning(issue)
@@ -0,0 +1,104 @@
+"""Check the pending-documents and receivables ledgers against the filtered group-bys they
+replace, then time both.
+
+Run from the repository root:  python -m benchmarks.ledger_benchmark [rows ...]   (default 100000 1000000)
+Exits with an error at the first filter state whose totals differ.
+"""
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.ledger import PendingLedger, ReceivablesLedger
+from app.query import PandasBackend
+from app.workbook import Workbook
+from benchmarks.synthetic_workbook import sheets
+
+CHECKS = 200
+REPEATS = 20
+
+
+def pending_query(query, by, has_po, supervisors, rows):
+    # The Pending Documents view before the ledger
+    where = [("job_status", "==", "Closed"), ("sav_doc", "isna")]
+    if has_po is not None:
+        where.append(("po", "notna" if has_po else "isna"))
+    if supervisors:
+        where.append((by, "in", supervisors))
+    return query.aggregate([by], {"Accrued": ("revenue", "sum")}, query.select(where, rows))
+
+
+def received_query(query, by, start, end):
+    # The Receivables Tracker view before the ledger, over every job
+    where = [("sav_date", ">=", start), ("sav_date", "<=", end)] if start is not None else []
+    return query.aggregate([by], {"Total Revenue": ("revenue", "sum")}, query.select(where))
+
+
+def _comparable(frame: pd.DataFrame) -> pd.DataFrame:
+    return frame.astype({column: object for column in frame.columns if isinstance(frame[column].dtype, pd.CategoricalDtype)})
+
+
+def assert_same(expected: pd.DataFrame, actual: pd.DataFrame, label: str):
+    pd.testing.assert_frame_equal(_comparable(expected), _comparable(actual), check_dtype=False, obj=label)
+
+
+def timed(run) -> float:
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main(sizes: list):
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        book = Workbook(sheets(rows=size), version="benchmark")
+        frame = book.dataset("atc nr")
+        query = PandasBackend(frame)
+        dates = frame["sav_date"].dropna()
+        print(f"rows per job sheet: {size:,}")
+
+        for by in ["regional_supervisor", "rs_proposed"]:
+            start = time.perf_counter()
+            pending, receivables = PendingLedger(frame, by), ReceivablesLedger(frame, by)
+            print(f"  {by:20} ledgers built in {(time.perf_counter() - start) * 1000:8.1f} ms")
+            supervisors = list(frame[by].dropna().unique())
+
+            for check in range(CHECKS):
+                has_po = [None, True, False][check % 3]
+                chosen = list(rng.choice(supervisors, rng.integers(0, len(supervisors) + 1), replace=False))
+                rows = None if check % 2 else np.sort(rng.choice(len(frame), len(frame) // 10, replace=False))
+                assert_same(
+                    pending_query(query, by, has_po, chosen, rows), pending.accrued(has_po, chosen, rows),
+                    f"pending by {by} ({has_po}, {chosen}, {'all' if rows is None else 'some'} rows)",
+                )
+                assert np.array_equal(pending.rows(has_po, chosen, rows), query.select(
+                    [("job_status", "==", "Closed"), ("sav_doc", "isna")]
+                    + ([("po", "notna" if has_po else "isna")] if has_po is not None else [])
+                    + ([(by, "in", chosen)] if chosen else []), rows,
+                ))
+
+                first, last = sorted(rng.choice(dates.to_numpy(), 2))
+                first, last = pd.Timestamp(first).normalize(), pd.Timestamp(last).normalize()
+                assert_same(received_query(query, by, first, last), receivables.received(first, last), f"received by {by}")
+            assert_same(received_query(query, by, None, None), receivables.received(), f"received by {by}")
+
+            first, last = pd.Timestamp("2022-01-01"), pd.Timestamp("2022-12-31")
+            print(
+                f"  {'pending, every job':30} query {timed(lambda: pending_query(query, by, True, [], None)) * 1000:8.2f} ms"
+                f"   ledger {timed(lambda: pending.accrued(True, [], None)) * 1000:8.3f} ms"
+            )
+            print(
+                f"  {'received in 2022':30} query {timed(lambda: received_query(query, by, first, last)) * 1000:8.2f} ms"
+                f"   ledger {timed(lambda: receivables.received(first, last)) * 1000:8.3f} ms"
+            )
+        print(f"  same totals for {CHECKS} filter states per supervisor column")
+        print()
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [100_000, 1_000_000])
@@ -0,0 +1,27 @@
+"""Frame memory of each page dataset before and after dtype compaction.
+
+Run from the repository root:  python -m benchmarks.memory_benchmark [rows]
+"""
+import sys
+
+from app.dtypes import compact, memory_report
+from app.workbook import DATASETS, JobDataset, Workbook
+from benchmarks.synthetic_workbook import sheets
+
+
+def main(rows: int):
+    book = Workbook(sheets(rows=rows), version="benchmark")
+    print(f"rows per job sheet: {rows:,}")
+    for name, spec in DATASETS.items():
+        raw = spec.build(book.sheet(spec.jobs), book) if isinstance(spec, JobDataset) else spec.build(book.sheet(spec.sheet))
+        before = memory_report(raw)["bytes"].sum()
+        after = memory_report(compact(raw))["bytes"].sum()
+        print(f"{name:18} {before / 1e6:8.2f} MB -> {after / 1e6:8.2f} MB  ({1 - after / before:.0%} smaller)")
+
+    book.build_all()
+    print()
+    print(book.memory_report().head(12).to_string())
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,34 @@
+"""Wall-clock time of the column-pruned parse against the number of worker processes.
+
+Run from the repository root:  python -m benchmarks.parallel_parse_benchmark [rows]
+"""
+import sys
+import time
+
+import pandas as pd
+
+from app.excel import read_sheets
+from app.workbook import PARSE_WORKERS, SHEET_COLUMNS
+from benchmarks.synthetic_workbook import workbook_bytes
+
+
+def main(rows: int):
+    content = workbook_bytes(rows=rows)
+    print(f"rows per job sheet: {rows:,}  default workers: {PARSE_WORKERS}")
+
+    baseline = None
+    for workers in sorted({1, 2, 3, 5, PARSE_WORKERS}):
+        start = time.perf_counter()
+        sheets = read_sheets(content, SHEET_COLUMNS, workers=workers)
+        elapsed = time.perf_counter() - start
+
+        # Every worker count must give the same frames
+        if baseline is None:
+            baseline = (sheets, elapsed)
+        for name, frame in sheets.items():
+            pd.testing.assert_frame_equal(frame, baseline[0][name], check_dtype=False)
+        print(f"workers {workers:2}  {elapsed * 1000:10.1f} ms  speed-up {baseline[1] / elapsed:4.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
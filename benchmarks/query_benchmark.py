@@ -0,0 +1,109 @@
+"""Check that the pandas and DuckDB query backends agree, then time them on the dashboards' queries.
+
+Run from the repository root:  python -m benchmarks.query_benchmark [rows ...]   (default 100000 1000000)
+Exits with an error at the first query whose results differ between the backends.
+"""
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.query import BACKENDS
+from app.workbook import Workbook
+from benchmarks.synthetic_workbook import sheets
+
+REPEATS = 5
+
+START = pd.Timestamp("2022-01-01")
+END = pd.Timestamp("2022-12-31 23:59:59")
+
+
+def ihs_region(query):
+    # One region, with the metrics and charts of the IHS dashboard
+    rows = query.select([("region", "==", "Lagos")])
+    return (
+        rows,
+        query.aggregate(["revenue_month"], {"Total_Revenue": ("total", "sum"), "expense": ("expense", "sum")}, rows),
+        query.aggregate(["region"], {"Count": ("alt_id", "count")}, rows),
+        query.aggregate(["job_type"], {"Count": ("alt_id", "count")}, rows),
+        query.aggregate(["request_date"], {"Count": ("alt_id", "count")}, rows),
+    )
+
+
+def ihs_closed_in_2022(query):
+    rows = query.select([
+        ("job_status", "==", "Closed"), ("request_date", ">=", START), ("request_date", "<=", END),
+    ])
+    return rows, query.aggregate(["revenue_month"], {"Total_Revenue": ("total", "sum"), "jobs": ("total", "size")}, rows)
+
+
+def ihs_all(query):
+    return (query.aggregate(["region", "job_type"], {"total": ("total", "sum"), "jobs": ("total", "size")}),)
+
+
+def atc_pending(query):
+    rows = query.select([
+        ("job_status", "==", "Closed"), ("sav_doc", "isna"), ("po", "notna"),
+        ("regional_supervisor", "in", ["RS 1", "RS 3"]),
+    ])
+    return rows, query.aggregate(["regional_supervisor"], {"Accrued": ("revenue", "sum")}, rows)
+
+
+def atc_received(query):
+    rows = query.select([("sav_date", ">=", START), ("sav_date", "<=", END)])
+    return rows, query.aggregate(["regional_supervisor"], {"Total Revenue": ("revenue", "sum")}, rows)
+
+
+QUERIES = {
+    "ihs nr": [ihs_region, ihs_closed_in_2022, ihs_all],
+    "atc nr": [atc_pending, atc_received],
+}
+
+
+def _comparable(frame: pd.DataFrame) -> pd.DataFrame:
+    # Group keys come back as categoricals from pandas and as plain values from DuckDB
+    return frame.astype({column: object for column in frame.columns if isinstance(frame[column].dtype, pd.CategoricalDtype)})
+
+
+def assert_same(expected, actual, label: str):
+    for left, right in zip(expected, actual):
+        if isinstance(left, np.ndarray):
+            assert np.array_equal(left, right), f"{label}: row ids differ"
+        else:
+            pd.testing.assert_frame_equal(_comparable(left), _comparable(right), check_dtype=False, obj=label)
+
+
+def timed(run, query) -> float:
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        run(query)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main(sizes: list):
+    for rows in sizes:
+        book = Workbook(sheets(rows=rows), version="benchmark")
+        print(f"rows per job sheet: {rows:,}")
+        for name, queries in QUERIES.items():
+            frame = book.dataset(name)
+            backends = {}
+            for backend, build in BACKENDS.items():
+                start = time.perf_counter()
+                backends[backend] = build(frame)
+                print(f"  {name:8} {backend:7} setup {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+            for run in queries:
+                results = {backend: run(query) for backend, query in backends.items()}
+                for backend, result in results.items():
+                    assert_same(results["pandas"], result, f"{run.__name__} on {backend}")
+                line = "  ".join(f"{backend} {timed(run, query) * 1000:8.1f} ms" for backend, query in backends.items())
+                print(f"  {run.__name__:20} same results   {line}")
+        print()
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [100_000, 1_000_000])
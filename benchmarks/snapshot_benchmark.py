@@ -0,0 +1,36 @@
+"""Compare the openpyxl parse of the workbook with loading its Arrow snapshot.
+
+Run from the repository root:  python -m benchmarks.snapshot_benchmark [rows]
+"""
+import sys
+import tempfile
+import time
+from hashlib import sha256
+
+from app.snapshot import load_snapshot, save_snapshot
+from app.workbook import WorkbookService
+from benchmarks.synthetic_workbook import workbook_bytes
+
+
+def main(rows: int):
+    content = workbook_bytes(rows=rows)
+    service = WorkbookService(url="")
+
+    start = time.perf_counter()
+    sheets = service.parse(content)
+    parse_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        save_snapshot(sha256(content).hexdigest(), sheets, {}, directory=directory)
+
+        start = time.perf_counter()
+        load_snapshot(directory=directory)
+        load_time = time.perf_counter() - start
+
+    print(f"rows per job sheet: {rows:,}  workbook size: {len(content) / 1e6:.1f} MB")
+    print(f"openpyxl parse:     {parse_time * 1000:10.1f} ms")
+    print(f"snapshot load:      {load_time * 1000:10.1f} ms  ({parse_time / load_time:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
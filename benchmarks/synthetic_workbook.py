@@ -0,0 +1,122 @@
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+REGIONS = ["Lagos", "Abuja", "Kano", "Port Harcourt", "Enugu", "Ibadan"]
+
+
+def ihs_sheets(rows: int, sites: int, rng) -> dict:
+    ihs_ids = [f"IHS_LAG_{i:05d}" for i in range(sites)]
+    dates = pd.to_datetime("2021-01-01") + pd.to_timedelta(rng.integers(0, 1400, rows), unit="D")
+    total = rng.integers(1_000, 500_000, rows).astype(float)
+    expense = total * rng.uniform(0.4, 0.9, rows)
+
+    ihs_nr_data = pd.DataFrame({
+        "request_date": dates,
+        "ihs_id": rng.choice(ihs_ids, rows),
+        "job_type": rng.choice(["AC", "Generator", "Civil", "Power", "Security"], rows),
+        "requirement": rng.choice(["Repair", "Replacement", "Installation", "Servicing"], rows),
+        "qty": rng.integers(1, 10, rows),
+        "unit": rng.choice(["Each", "Metre", "Lot"], rows),
+        "total": total,
+        "approval": rng.choice(["Approved", "Pending"], rows),
+        "approval_date": dates,
+        "job_status": rng.choice(["Closed", "Open", "WIP", "Cancelled"], rows),
+        "closure_date": dates,
+        "execution": rng.choice(["InHouse", "Vendor"], rows),
+        "payment_ref": rng.choice(["PR1", "PR2", "PR3"], rows),
+        "executor": rng.choice(["Team A", "Team B", "Team C"], rows),
+        "qty_used": rng.integers(1, 10, rows),
+        "unit_used": rng.choice(["Each", "Metre", "Lot"], rows),
+        "expense": expense,
+        "profit": total - expense,
+        "revenue_month": (dates + pd.offsets.MonthBegin(0)).strftime("%Y-%m-%d"),
+        "reference": rng.choice(["REF-A", "REF-B", "REF-C", "REF-D"], rows),
+        "fault": rng.choice(["Generator fault", "AC leak", "Rectifier fault", "Fence damage"], rows),
+        "remarks": rng.choice(["", "urgent", "follow up"], rows),
+    })
+    ihs_matrix = pd.DataFrame({
+        "ihs_id": ihs_ids,
+        "alt_id": [f"ALT{i:06d}" for i in range(sites)],
+        "Regional Manager": rng.choice(["RM North", "RM South", "RM West"], sites),
+        "Zonal Coordinator": rng.choice(["ZC 1", "ZC 2", "ZC 3", "ZC 4"], sites),
+        "region": rng.choice(REGIONS, sites),
+        "Cluster": rng.choice(["C1", "C2", "C3", "C4", "C5"], sites),
+    })
+    return {"ihs nr data": ihs_nr_data, "ihsmatrix": ihs_matrix}
+
+
+def atc_sheets(rows: int, sites: int, rng) -> dict:
+    atc_ids = [f"ATC{i:06d}" for i in range(sites)]
+    sav_date = pd.Series(pd.to_datetime("2022-01-01") + pd.to_timedelta(rng.integers(0, 1000, rows), unit="D"))
+    sav_date[rng.random(rows) < 0.3] = pd.NaT
+
+    atc_nr_data = pd.DataFrame({
+        "jobcode": rng.choice([f"JC{i:02d}" for i in range(40)], rows),
+        "category": rng.choice(["Civil", "Power", "Security"], rows),
+        "description": rng.choice(["Painting", "Fencing", "Generator overhaul"], rows),
+        "job": rng.choice(["Paint", "Fence", "Gen", "Battery", "Rectifier"], rows),
+        "atc_id": rng.choice(atc_ids, rows),
+        "year": rng.choice([2022, 2023, 2024], rows),
+        "sav_date": sav_date,
+        "month": sav_date,
+        "qty": rng.integers(1, 10, rows),
+        "unit": rng.choice(["Each", "Lot"], rows),
+        "revenue": rng.integers(1_000, 300_000, rows).astype(float),
+        "qty_used": rng.integers(1, 10, rows),
+        "unit_used": rng.choice(["Each", "Lot"], rows),
+        "expense": rng.integers(500, 150_000, rows).astype(float),
+        "job_status": rng.choice(["Closed", "Open", "WIP"], rows),
+        "sav_doc": np.where(rng.random(rows) < 0.5, "SAV", None),
+        "po": np.where(rng.random(rows) < 0.5, "PO-001", None),
+        "invoice": sav_date,
+        "status": rng.choice(["Paid", "Unpaid"], rows),
+        "comment": rng.choice(["", "awaiting PO"], rows),
+    })
+    atc_matrix = pd.DataFrame({
+        "atc_id": atc_ids,
+        "region": rng.choice(REGIONS, sites),
+        "state": rng.choice(["Lagos", "FCT", "Kano", "Rivers"], sites),
+        "cluster": rng.choice(["C1", "C2", "C3"], sites),
+        "regional_supervisor": rng.choice(["RS 1", "RS 2", "RS 3", "RS 4"], sites),
+        "rs_proposed": rng.choice(["RS A", "RS B", "RS C"], sites),
+    })
+    return {"atc nr data": atc_nr_data, "atcmatrix": atc_matrix}
+
+
+def pricebook_sheet(rows: int, rng) -> dict:
+    parts = ["alternator", "battery", "radiator", "starter", "rectifier", "fence", "aircon", "cable"]
+    actions = ["replacement", "repair", "servicing", "installation"]
+    faults = [f"{rng.choice(parts)} {rng.choice(actions)} {i}" for i in range(rows)]
+    return {"ihspricebook": pd.DataFrame({
+        "fault": faults,
+        "Approval": rng.integers(1_000, 200_000, rows),
+        "InHouse": rng.integers(500, 150_000, rows),
+        "Severity": rng.choice(["Low", "Medium", "High"], rows),
+        "Essense": rng.choice(["Critical", "Routine"], rows),
+    })}
+
+
+def sheets(rows: int = 20_000, sites: int = 3_000, pricebook_rows: int = 1_000, extra_columns: int = 0,
+           seed: int = 0) -> dict:
+    """Frames shaped like the five sheets of the OneDrive workbook, filled with random data.
+    'extra_columns' adds that many columns no page reads to each job sheet."""
+    rng = np.random.default_rng(seed)
+    frames = {**ihs_sheets(rows, sites, rng), **atc_sheets(rows, sites, rng), **pricebook_sheet(pricebook_rows, rng)}
+    for name in ("ihs nr data", "atc nr data"):
+        for i in range(extra_columns):
+            frames[name][f"notes_{i}"] = rng.choice(["n/a", "checked", "see email"], rows)
+    return frames
+
+
+def excel_bytes(frames: dict) -> bytes:
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        for name, frame in frames.items():
+            frame.to_excel(writer, sheet_name=name, index=False)
+    return buffer.getvalue()
+
+
+def workbook_bytes(**kwargs) -> bytes:
+    return excel_bytes(sheets(**kwargs))